@@ -0,0 +1,178 @@
+import hashlib, io, json, sqlite3, threading, time, zlib
+from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+# Record every exchange of a run into one SQLite file (zlib bodies, indexed by method + URL + request-body hash), then
+# serve a later run from it: same code paths, no network. Repeated identical requests replay in recorded order.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+CREATE TABLE IF NOT EXISTS exchanges (
+    id INTEGER PRIMARY KEY, key TEXT NOT NULL, seq INTEGER NOT NULL, ts REAL, method TEXT, url TEXT,
+    status INTEGER, reason TEXT, headers TEXT, body BLOB, size INTEGER, truncated INTEGER, elapsed_ms REAL, error TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS exchanges_key ON exchanges (key, seq);
+"""
+MAX_BODY_BYTES = 16 * 1024 * 1024
+FLUSH_EVERY = 200
+# bodies are stored decoded, so transfer framing and encodings are not replayed
+DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection", "keep-alive"}
+
+def request_key(method, url, body=None):
+    if isinstance(body, str): body = body.encode("utf-8")
+    if body is not None and not isinstance(body, bytes): body = repr(body).encode("utf-8")
+    return f"{method.upper()} {url} {hashlib.blake2b(body or b'', digest_size=8).hexdigest()}"
+
+class HttpArchive:
+    def __init__(self, path, mode="replay", target=None, max_body=MAX_BODY_BYTES):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"archive mode must be record or replay, got {mode!r}")
+        if mode == "replay" and not Path(path).exists():
+            raise FileNotFoundError(f"no HTTP archive at {path}")
+        self.path, self.mode, self.max_body = str(path), mode, max_body
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.seq, self.rows = {}, []
+        self.stats = {"mode": mode, "path": self.path, "recorded": 0, "replayed": 0, "missed": 0, "bytes": 0}
+        if mode == "record":
+            # one archive per run: recording over an existing file starts it afresh
+            with self.db:
+                self.db.execute("DELETE FROM exchanges")
+                self.db.execute("DELETE FROM meta")
+                self.db.executemany("INSERT INTO meta (k, v) VALUES (?, ?)", [("target", target or ""), ("created", str(time.time()))])
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def meta(self, k):
+        row = self.db.execute("SELECT v FROM meta WHERE k = ?", (k,)).fetchone()
+        return row[0] if row else None
+
+    def adapter(self, **kwargs):
+        return (ReplayAdapter if self.replaying else RecordingAdapter)(self, **kwargs)
+
+    def put(self, key, method, url, status=None, reason=None, headers=None, body=b"", truncated=False, elapsed_ms=None, error=None):
+        with self.lock:
+            seq = self.seq.get(key, 0)
+            self.seq[key] = seq + 1
+            self.rows.append((key, seq, time.time(), method, url, status, reason, json.dumps(headers or {}),
+                              zlib.compress(body, 6) if body else None, len(body or b""), int(bool(truncated)), elapsed_ms, error))
+            self.stats["recorded"] += 1
+            self.stats["bytes"] += len(body or b"")
+            if len(self.rows) >= FLUSH_EVERY: self._flush()
+
+    def get(self, key):
+        # nth request for a key gets the nth recording; once those run out the last one repeats
+        with self.lock:
+            seq = self.seq.get(key, 0)
+            self.seq[key] = seq + 1
+            row = self.db.execute("SELECT status, reason, headers, body, truncated, error FROM exchanges WHERE key = ? AND seq <= ? "
+                                  "ORDER BY seq DESC LIMIT 1", (key, seq)).fetchone()
+            self.stats["replayed" if row else "missed"] += 1
+        if row is None: return None
+        status, reason, headers, body, truncated, error = row
+        return {"status": status, "reason": reason, "headers": json.loads(headers), "body": zlib.decompress(body) if body else b"",
+                "truncated": bool(truncated), "error": error}
+
+    def put_value(self, key, value):
+        # non-HTTP outcomes (WebSocket handshakes) stored as JSON under their own key
+        self.put(key, "VALUE", key, body=json.dumps(value).encode("utf-8"))
+
+    def get_value(self, key):
+        row = self.get(request_key("VALUE", key))
+        return json.loads(row["body"]) if row and row["body"] else None
+
+    def _flush(self):
+        if not self.rows: return
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO exchanges (key, seq, ts, method, url, status, reason, headers, body, size, truncated, "
+                                "elapsed_ms, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self.rows)
+        self.rows = []
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            self.db.close()
+        return dict(self.stats)
+
+class _TeeRaw:
+    # stands in for response.raw: passes the (decoded) body through and keeps up to `cap` bytes for the archive
+    def __init__(self, raw, done, cap):
+        self._raw, self._done, self._cap = raw, done, cap
+        self._buf, self._size, self._finished = [], 0, False
+
+    def _keep(self, data):
+        if data and self._size < self._cap:
+            self._buf.append(data[:self._cap - self._size])
+        self._size += len(data or b"")
+        return data
+
+    def _finish(self, complete):
+        if self._finished: return
+        self._finished = True
+        self._done(b"".join(self._buf), self._size > self._cap or not complete)
+
+    def stream(self, amt=65536, decode_content=None):
+        for chunk in self._raw.stream(amt, decode_content=True):
+            yield self._keep(chunk)
+        self._finish(True)
+
+    def read(self, amt=None, decode_content=None, **kwargs):
+        data = self._keep(self._raw.read(amt, decode_content=True, **kwargs))
+        if amt is None or not data: self._finish(True)
+        return data
+
+    def read1(self, amt=None, decode_content=None):
+        data = self._keep(self._raw.read1(amt, decode_content=True))
+        if not data: self._finish(True)
+        return data
+
+    def close(self):
+        # closed before the end (bounded reads, probes that never read): archived as truncated
+        self._finish(False)
+        self._raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+class RecordingAdapter(HTTPAdapter):
+    def __init__(self, archive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        key = request_key(request.method, request.url, request.body)
+        t0 = time.perf_counter()
+        try:
+            r = super().send(request, **kwargs)
+        except requests.RequestException as e:
+            self.archive.put(key, request.method, request.url, elapsed_ms=round((time.perf_counter() - t0) * 1000, 3),
+                             error=f"{type(e).__name__}: {str(e)[:300]}")
+            raise
+        elapsed = round((time.perf_counter() - t0) * 1000, 3)
+        headers = {k: v for k, v in r.headers.items() if k.lower() not in DROP_HEADERS}
+        r.raw = _TeeRaw(r.raw, lambda body, truncated: self.archive.put(key, request.method, request.url, r.status_code, r.reason, headers,
+                                                                       body, truncated, elapsed), self.archive.max_body)
+        return r
+
+class ReplayAdapter(HTTPAdapter):
+    def __init__(self, archive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        row = self.archive.get(request_key(request.method, request.url, request.body))
+        if row is None:
+            raise requests.ConnectionError(f"not in archive: {request.method} {request.url}", request=request)
+        if row["error"]:
+            name, _, msg = row["error"].partition(": ")
+            exc = getattr(requests.exceptions, name, None)
+            raise (exc if isinstance(exc, type) and issubclass(exc, requests.RequestException) else requests.ConnectionError)(msg, request=request)
+        headers = dict(row["headers"], **{"Content-Length": str(len(row["body"]))})
+        raw = HTTPResponse(body=io.BytesIO(row["body"]), headers=headers, status=row["status"], reason=row["reason"],
+                           preload_content=False, decode_content=False, request_method=request.method, request_url=request.url)
+        return self.build_response(request, raw)
@@ -0,0 +1,60 @@
+
+import hashlib, threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+CACHE_BUST_PARAMS = {"v","ver","version","t","ts","_","cb","cachebust","cache","rev","build","hash","h"}
+
+def normalize_asset_url(url):
+    sp = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(sp.query, keep_blank_values=True) if k.lower() not in CACHE_BUST_PARAMS]
+    return urlunsplit((sp.scheme.lower(), sp.netloc.lower(), sp.path or "/", urlencode(sorted(query)), ""))
+
+class AssetCache:
+    # run-scoped: one fetch per normalized URL, one scan per distinct body (sha256);
+    # with a CrawlState, bundles unchanged since the last run are not rescanned either
+    def __init__(self, scan, state=None):
+        self.scan, self.state = scan, state
+        self.by_url, self.by_hash = {}, {}
+        self.stats = {"url_hits": 0, "hash_hits": 0, "misses": 0, "bytes_fetched": 0, "bytes_saved": 0}
+        self.lock = threading.Lock()
+
+    def get(self, url, submit, fetch):
+        key = normalize_asset_url(url)
+        with self.lock:
+            fut = self.by_url.get(key)
+            if fut is not None:
+                self.stats["url_hits"] += 1
+                return fut, True
+            self.stats["misses"] += 1
+            fut = self.by_url[key] = submit(url, lambda: self._load(url, fetch))
+            return fut, False
+
+    def resolve(self, fut, hit):
+        entry = fut.result()
+        if hit and entry:
+            with self.lock:
+                self.stats["bytes_saved"] += entry["size"]
+        return entry
+
+    def _load(self, url, fetch):
+        r = fetch(url)
+        if self.state and r is not None and r.status_code == 304:
+            return self.state.reuse(url, r)
+        if not r or r.status_code >= 400 or "javascript" not in r.headers.get("Content-Type",""):
+            return None
+        body = r.content
+        digest = hashlib.sha256(body).hexdigest()
+        with self.lock:
+            self.stats["bytes_fetched"] += len(body)
+            entry = self.by_hash.get(digest)
+            if entry:
+                self.stats["hash_hits"] += 1
+        if not entry:
+            entry = self.state.reuse(url, r, digest) if self.state else None
+            if not entry:
+                entry = dict(self.scan(r.text), size=len(body))
+                if self.state: self.state.record(url, "script", r, digest, entry)
+            with self.lock:
+                return self.by_hash.setdefault(digest, entry)
+        if self.state: self.state.record(url, "script", r, digest, entry)
+        return entry
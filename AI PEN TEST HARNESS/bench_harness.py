@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+import argparse, json, os, platform, subprocess, sys, tempfile, time
+from pathlib import Path
+import bench_server
+
+# Each scenario runs in a fresh interpreter against the local fixture (bench_server.py), so CPU time and
+# peak RSS belong to that scenario alone; requests/bytes are counted on the server side.
+SCENARIOS = ("recon", "manifest_ws", "active_prompt", "rag_leak", "mcp_scan", "full")
+LOWER_IS_BETTER = ("wall_s", "cpu_s", "peak_rss_mb")
+HIGHER_IS_BETTER = ("pages_per_s", "requests_per_s", "mb_per_s")
+
+def write_plan(base, workdir, cfg, concurrency):
+    plan = {"target": base.rstrip("/"),
+            "chat": {"endpoint": base + "api/chat", "method": "POST", "rate_limit_per_min": 600000, "concurrency": concurrency,
+                     "json_template": {"messages": [{"role": "user", "content": "__PAYLOAD__"}], "stream": cfg["chat_stream"]},
+                     "stream": "sse" if cfg["chat_stream"] else "none"},
+            "rag": {"list_endpoint": base + "rag/list", "get_endpoint": base + "rag/get", "max_docs": cfg["rag_docs"],
+                    "max_doc_bytes": cfg["rag_doc_kb"] * 2048, "concurrency": concurrency, "rate_limit_per_min": 0,
+                    "pagination": {"type": "cursor", "param": "cursor", "cursor_field": "next_cursor", "size_param": "limit",
+                                   "page_size": cfg["rag_page_size"]}},
+            "mcp": {"http_endpoints": [base + "mcp"], "concurrency": concurrency}}
+    path = Path(workdir) / "plan.yaml"
+    path.write_text(json.dumps(plan, indent=2), encoding="utf-8")  # JSON is valid YAML
+    return str(path)
+
+def _cpu():
+    # worker processes (parse pool, samples pool) count once they have been joined
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+def run_scenario(name, base, plan, workdir, pages, concurrency, ws_refs, parse_workers=0):
+    # child side: import, then time only the scenario itself
+    from harness import MODULES, PROMPT_PAYLOADS, run_harness
+    from utils.http import new_session
+    from utils.memstats import peak_rss_mb
+    out = str(Path(workdir) / name)
+    session = new_session(concurrency)
+    t0, c0 = time.perf_counter(), _cpu()
+    if name == "recon":
+        res = MODULES["recon_mapper"].run(session, base, max_pages=pages, concurrency=concurrency, parse_workers=parse_workers)
+        extra = {"pages": len(res["pages"]), "scripts": len(res["scripts"])}
+    elif name == "manifest_ws":
+        mw = MODULES["manifest_and_ws"]
+        man = mw.fetch_manifest_and_openapi(session, base)
+        ws = mw.probe_ws([f"ws://{base.split('//', 1)[1].rstrip('/')}/ws/{i}" for i in range(ws_refs)], timeout=5, workers=concurrency)
+        extra = {"openapi_operations": len(man.get("openapi_endpoints", [])), "ws_probed": len(ws)}
+    elif name == "active_prompt":
+        res = MODULES["active_prompt_injection"].run(plan, PROMPT_PAYLOADS, outdir=out)
+        extra = {"payloads": res["count"]}
+    elif name == "rag_leak":
+        res = MODULES["rag_leak_tester"].run(plan, outdir=out, session=session)
+        extra = {"docs": res["docs"], "base64_like": res["base64_like"]}
+    elif name == "mcp_scan":
+        res = MODULES["mcp_scanner"].run(plan, outdir=out, session=session)
+        extra = {"urls": res["count"]}
+    else:
+        agg = run_harness(base, max_pages=pages, outdir=out, plan=plan, run_active=True, concurrency=concurrency, cache_dir=None,
+                          parse_workers=parse_workers)
+        extra = {"pages": len(agg["recon"]["pages"])}
+    return dict(extra, wall_s=round(time.perf_counter() - t0, 3), cpu_s=round(_cpu() - c0, 3), peak_rss_mb=peak_rss_mb())
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent).stdout.strip() or None
+    except OSError:
+        return None
+
+def _rates(r, wall):
+    r["requests_per_s"] = round(r["requests"] / wall, 1) if wall else None
+    r["mb_per_s"] = round(r["bytes"] / wall / 1e6, 2) if wall else None
+    if "pages" in r: r["pages_per_s"] = round(r["pages"] / wall, 1) if wall else None
+    return r
+
+def run_suite(args, cfg):
+    srv = bench_server.serve(cfg)
+    base = f"http://127.0.0.1:{srv.server_port}/"
+    stats = srv.fixture.stats
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="aiph-bench-") as workdir:
+        plan = write_plan(base, workdir, srv.fixture.cfg, args.concurrency)
+        for name in args.scenarios:
+            best = None
+            for _ in range(args.repeat):
+                before = stats.snapshot()
+                result_path = Path(workdir) / f"{name}.json"
+                cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--base", base, "--plan", plan, "--workdir", workdir,
+                       "--result", str(result_path), "--pages", str(cfg["pages"]), "--concurrency", str(args.concurrency),
+                       "--ws-refs", str(cfg["ws_refs"]), "--parse-workers", str(args.parse_workers)]
+                p = subprocess.run(cmd, stdout=None if args.verbose else subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+                if p.returncode != 0:
+                    results[name] = {"error": (p.stderr.strip().splitlines() or ["failed"])[-1]}
+                    break
+                after = stats.snapshot()
+                r = json.loads(result_path.read_text(encoding="utf-8"))
+                r.update(requests=after["requests"] - before["requests"], bytes=after["bytes"] - before["bytes"])
+                if best is None or r["wall_s"] < best["wall_s"]: best = r
+            if best: results[name] = _rates(best, best["wall_s"])
+            print(_line(name, results[name]), file=sys.stderr)
+    srv.shutdown()
+    return {"meta": {"commit": _git_rev(), "created": int(time.time()), "python": platform.python_version(),
+                     "platform": platform.platform(), "cpus": os.cpu_count(), "repeat": args.repeat,
+                     "concurrency": args.concurrency, "parse_workers": args.parse_workers, "fixture": srv.fixture.cfg},
+            "results": results}
+
+def _line(name, r):
+    if "error" in r: return f"{name:<14} ERROR {r['error']}"
+    pages = f"  {r['pages_per_s']:>7} pages/s" if "pages_per_s" in r else ""
+    return (f"{name:<14} {r['wall_s']:>8.2f} s  cpu {r['cpu_s']:>7.2f} s  rss {r['peak_rss_mb']} MB  "
+            f"{r['requests']:>6} req ({r['requests_per_s']}/s)  {r['bytes'] / 1e6:>8.1f} MB{pages}")
+
+def compare(old, new, tolerance):
+    # one line per metric that moved; returns the number of regressions beyond `tolerance` (0.15 = 15 %)
+    regressions = 0
+    print(f"baseline {old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    for name, r in new["results"].items():
+        o = old.get("results", {}).get(name)
+        if not o or "error" in o or "error" in r: continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if not o.get(metric) or r.get(metric) is None: continue
+            change = (r[metric] - o[metric]) / o[metric]
+            worse = change > tolerance if metric in LOWER_IS_BETTER else change < -tolerance
+            regressions += worse
+            print(f"{'REGRESSION' if worse else 'ok':<10} {name:<14} {metric:<15} {o[metric]:>10} -> {r[metric]:<10} {change:+.1%}")
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the harness modules against a local fixture target")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {', '.join(SCENARIOS)}")
+    ap.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the fastest is kept")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--parse-workers", type=int, default=0, help="recon/full: worker processes for HTML extraction and JS scans")
+    ap.add_argument("--out", default="bench/baseline.json", help="Where to write the JSON baseline")
+    ap.add_argument("--compare", default=None, help="Earlier baseline to compare against (exit 1 on regressions)")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="Relative change tolerated before a metric counts as a regression")
+    ap.add_argument("--verbose", action="store_true", help="Show module output")
+    bench_server.add_arguments(ap)
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    for hidden in ("--base", "--plan", "--workdir", "--result"):
+        ap.add_argument(hidden, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        r = run_scenario(args.child, args.base, args.plan, args.workdir, args.pages, args.concurrency, args.ws_refs, args.parse_workers)
+        Path(args.result).write_text(json.dumps(r), encoding="utf-8")
+        return 0
+
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown: ap.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    baseline = run_suite(args, bench_server.config_from_args(args))
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.out).write_text(json.dumps(baseline, indent=2), encoding="utf-8")
+    print(f"baseline written to {args.out}", file=sys.stderr)
+    if args.compare:
+        return 1 if compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), baseline, args.tolerance) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+import argparse, random, re, string, time
+from modules.shared import KEYWORDS, JS_ROUTE_PATTERNS
+from modules.matcher import Matcher, WS_PATTERN, iter_chunks
+
+def synthetic_bundle(size_mb, seed=7):
+    rnd = random.Random(seed)
+    ident = lambda: "".join(rnd.choice(string.ascii_letters) for _ in range(rnd.randint(1, 8)))
+    snippets = ['"/api/v1/chat"', '"/api/rag/list"', '"wss://rt.example.test/socket"', 'fetch("/v2/completions")',
+                '"https://api.example.test/v1/embeddings"', "OpenAI", "Assistant", "prompt"]
+    parts, size = [], 0
+    while size < size_mb * 1024 * 1024:
+        p = rnd.choice(snippets) if rnd.random() < 0.01 else f"var {ident()}=function({ident()}){{return {ident()}.{ident()}({rnd.randint(0, 9999)})}};"
+        parts.append(p)
+        size += len(p)
+    return "".join(parts)
+
+def baseline(text):
+    # recon.py before the compiled matcher
+    routes = set()
+    for pat in JS_ROUTE_PATTERNS:
+        for m in re.findall(pat, text, flags=re.IGNORECASE):
+            routes.add(m)
+    ws = set(re.findall(WS_PATTERN, text, flags=re.IGNORECASE))
+    return {"keywords": [k for k in KEYWORDS if k.lower() in text.lower()], "routes": routes, "ws_urls": ws}
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        res = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, res
+
+def main():
+    ap = argparse.ArgumentParser(description="Micro-benchmark: compiled matcher vs per-pattern scan")
+    ap.add_argument("--size-mb", type=float, default=4)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--chunk-kb", type=int, default=256)
+    args = ap.parse_args()
+
+    text = synthetic_bundle(args.size_mb)
+    matcher = Matcher(KEYWORDS, JS_ROUTE_PATTERNS)
+    t_base, r_base = timed(lambda: baseline(text), args.repeat)
+    t_scan, r_scan = timed(lambda: matcher.scan(text), args.repeat)
+    t_chunk, r_chunk = timed(lambda: matcher.scan_chunks(iter_chunks(text, args.chunk_kb * 1024)), args.repeat)
+    t_kw_base, kw_base = timed(lambda: [k for k in KEYWORDS if k.lower() in text.lower()], args.repeat)
+    t_kw, kw = timed(lambda: matcher.keywords_in(text), args.repeat)
+
+    print(f"bundle: {len(text)/1e6:.1f} MB, {len(KEYWORDS)} keywords, {len(JS_ROUTE_PATTERNS)} route patterns")
+    print(f"baseline    {t_base*1000:8.1f} ms")
+    print(f"scan        {t_scan*1000:8.1f} ms  x{t_base/t_scan:.1f}  same={r_scan == r_base}")
+    print(f"scan_chunks {t_chunk*1000:8.1f} ms  x{t_base/t_chunk:.1f}  same={r_chunk == r_base}")
+    print(f"keywords    {t_kw_base*1000:8.1f} ms -> {t_kw*1000:.1f} ms  x{t_kw_base/t_kw:.1f}  same={kw == kw_base}")
+
+if __name__ == "__main__":
+    main()
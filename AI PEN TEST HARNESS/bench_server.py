@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+import argparse, base64, hashlib, json, random, re, sys, threading, time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Local stand-in target for bench_harness.py: synthetic site, ai-plugin manifest + OpenAPI, chat (JSON or SSE), RAG, MCP.
+
+DEFAULTS = {
+    "pages": 200, "links_per_page": 6,
+    "page_kb": 0,                   # filler markup per page, for parse-bound runs
+    "bundle_kb": 256,               # shared vendor.js
+    "busted_kb": 64,                # main.js, requested with ?v=<page % cache_bust_variants>
+    "cache_bust_variants": 5,
+    "ws_refs": 4,                   # distinct ws:// URLs spread over the pages
+    "spec_ops": 2000, "spec_yaml": False,
+    "chat_latency_ms": 50, "chat_stream": False, "chat_chunks": 20,
+    "rag_docs": 500, "rag_doc_kb": 64, "rag_page_size": 100,
+    "mcp_tools": 250, "mcp_page_size": 100,
+    "seed": 7,
+}
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+
+    def add(self, n_bytes, requests=0):
+        with self.lock:
+            self.requests += requests
+            self.bytes += n_bytes
+
+    def snapshot(self):
+        with self.lock:
+            return {"requests": self.requests, "bytes": self.bytes}
+
+def _filler(rnd, kb, extra=""):
+    ident = lambda: "".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rnd.randint(2, 8)))
+    parts, size = [extra], len(extra)
+    while size < kb * 1024:
+        p = f"var {ident()}=function({ident()}){{return {ident()}.{ident()}({rnd.randint(0, 9999)})}};"
+        parts.append(p)
+        size += len(p)
+    return "".join(parts)
+
+def build_spec(cfg):
+    rnd = random.Random(cfg["seed"])
+    paths = {}
+    for i in range(cfg["spec_ops"]):
+        res = f"/api/v1/res{i // 4}"
+        path = res if i % 2 else res + "/{id}"
+        op = {"operationId": f"op{i}", "summary": "synthetic operation " * 4,
+              "parameters": [{"name": "id", "in": "path", "required": True, "schema": {"type": "string"}}] if "{id}" in path else
+                            [{"name": "q", "in": "query", "schema": {"type": "string"}}, {"$ref": "#/components/parameters/Limit"}],
+              "responses": {"200": {"description": "ok", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}}}}}
+        if rnd.random() < 0.3: op["security"] = []
+        method = ("get", "post", "put", "delete")[i % 4]
+        if method in ("post", "put"):
+            op["requestBody"] = {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}}}
+        paths.setdefault(path, {})[method] = op
+    return {"openapi": "3.0.3", "info": {"title": "bench", "version": "1"}, "paths": paths,
+            "security": [{"bearer": []}],
+            "components": {"parameters": {"Limit": {"name": "limit", "in": "query", "schema": {"type": "integer"}}},
+                           "schemas": {"Item": {"type": "object", "properties": {f"f{k}": {"type": "string"} for k in range(20)}}},
+                           "securitySchemes": {"bearer": {"type": "http", "scheme": "bearer"}}}}
+
+class Fixture:
+    # everything is generated once up front so the server itself costs as little as possible during a run
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.stats = Stats()
+        rnd = random.Random(cfg["seed"])
+        self.vendor = _filler(rnd, cfg["bundle_kb"], 'var cdn="https://cdn.bench.test/lib.js";/* openai assistant */').encode()
+        self.main = _filler(rnd, cfg["busted_kb"], 'var a="/api/v1/chat";fetch("/api/rag/list");').encode()
+        self.links = [[rnd.randrange(cfg["pages"]) for _ in range(cfg["links_per_page"])] for _ in range(cfg["pages"])]
+        row = '<div class="row"><span>assistant</span><p>lorem ipsum <b>dolor</b> sit amet, <i>consectetur</i> adipiscing</p></div>'
+        self.filler = row * (cfg["page_kb"] * 1024 // len(row))
+        spec = build_spec(cfg)
+        if cfg["spec_yaml"]:
+            import yaml
+            self.spec, self.spec_ctype = yaml.safe_dump(spec, sort_keys=False).encode(), "application/yaml"
+        else:
+            self.spec, self.spec_ctype = json.dumps(spec).encode(), "application/json"
+        self.spec_etag = '"' + hashlib.sha256(self.spec).hexdigest()[:16] + '"'
+        self.tools = [{"name": f"tool_{i}", "description": "d" * 200, "inputSchema": {"properties": {"a": {}, "b": {}}}}
+                      for i in range(cfg["mcp_tools"])]
+        self.doc = ("lorem ipsum dolor sit amet # section\n" * (cfg["rag_doc_kb"] * 1024 // 37 + 1)).encode()[:cfg["rag_doc_kb"] * 1024]
+        self.leak = base64.b64encode(bytes(rnd.randrange(256) for _ in range(cfg["rag_doc_kb"] * 768)))
+
+    def page(self, i, port):
+        c = self.cfg
+        links = "".join(f'<a href="/p/{j}">page {j}</a>' for j in self.links[i])
+        ws = f'<script>var sock="ws://127.0.0.1:{port}/ws/{i % c["ws_refs"]}";</script>' if c["ws_refs"] else ""
+        return (f'<html><head><meta charset="utf-8"><title>p{i}</title>'
+                f'<script src="/static/main.js?v={i % c["cache_bust_variants"]}"></script><script src="/static/vendor.js"></script></head>'
+                f'<body><h1>AI assistant chat {i}</h1>{self.filler}{links}<form action="/api/v1/chat" method="post"></form>{ws}</body></html>').encode()
+
+    def rpc(self, msg):
+        m, i = msg.get("method"), msg.get("id")
+        if i is None: return None
+        if m == "initialize":
+            result = {"protocolVersion": "2025-03-26", "serverInfo": {"name": "bench", "version": "1"},
+                      "capabilities": {"tools": {}, "resources": {}, "prompts": {}}}
+        elif m == "tools/list":
+            c = int((msg.get("params") or {}).get("cursor") or 0)
+            result = {"tools": self.tools[c:c + self.cfg["mcp_page_size"]]}
+            if c + self.cfg["mcp_page_size"] < len(self.tools): result["nextCursor"] = str(c + self.cfg["mcp_page_size"])
+        elif m == "resources/list":
+            result = {"resources": [{"uri": "file:///srv/data.db", "name": "data"}]}
+        elif m == "prompts/list":
+            result = {"prompts": [{"name": "summarize"}]}
+        else:
+            return {"jsonrpc": "2.0", "id": i, "error": {"code": -32601, "message": "Method not found"}}
+        return {"jsonrpc": "2.0", "id": i, "result": result}
+
+def make_handler(fx):
+    cfg = fx.cfg
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *a):
+            pass
+
+        def send(self, code, body=b"", ctype="application/json", headers=None, head=False):
+            self.send_response(code)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            if not head: self.wfile.write(body)
+            fx.stats.add(0 if head else len(body), requests=1)
+
+        def body(self):
+            n = int(self.headers.get("Content-Length") or 0)
+            try:
+                return json.loads(self.rfile.read(n) or b"{}")
+            except ValueError:
+                return {}
+
+        def do_HEAD(self):
+            self.do_GET(head=True)
+
+        def do_GET(self, head=False):
+            path = self.path.split("?")[0]
+            m = re.fullmatch(r"/p/(\d+)", path)
+            if path == "/" or (m and int(m.group(1)) < cfg["pages"]):
+                return self.send(200, fx.page(int(m.group(1)) if m else 0, self.server.server_port), "text/html; charset=utf-8", head=head)
+            if path == "/static/vendor.js": return self.send(200, fx.vendor, "application/javascript", head=head)
+            if path == "/static/main.js": return self.send(200, fx.main, "application/javascript", head=head)
+            if path == "/.well-known/ai-plugin.json":
+                return self.send(200, json.dumps({"schema_version": "v1", "name_for_model": "bench",
+                                                  "api": {"type": "openapi", "url": "/openapi.json"}}).encode(), head=head)
+            if path == "/openapi.json":
+                if self.headers.get("If-None-Match") == fx.spec_etag: return self.send(304, head=True)
+                return self.send(200, fx.spec, fx.spec_ctype, {"ETag": fx.spec_etag}, head=head)
+            if path == "/.well-known/mcp.json":
+                return self.send(200, json.dumps({"tools": fx.tools[:15]}).encode(), head=head)
+            if path == "/mcp": return self.send(405, head=head)
+            self.send(404, b"not found", "text/plain", head=head)
+
+        def do_POST(self):
+            path = self.path.split("?")[0]
+            body = self.body()
+            if path == "/api/chat": return self.chat(body)
+            if path == "/rag/list":
+                start, size = int(body.get("cursor") or 0), int(body.get("limit") or cfg["rag_page_size"])
+                ids = range(start, min(cfg["rag_docs"], start + size))
+                out = {"items": [{"id": i, "title": f"doc {i}"} for i in ids],
+                       "next_cursor": str(start + size) if start + size < cfg["rag_docs"] else None}
+                return self.send(200, json.dumps(out).encode())
+            if path == "/rag/get":
+                i = int(body.get("id") or 0)
+                return self.send(200, fx.leak if i % 10 == 0 else fx.doc, "text/plain")
+            if path == "/mcp":
+                r = fx.rpc(body)
+                if r is None: return self.send(202)
+                return self.send(200, json.dumps(r).encode(), headers={"Mcp-Session-Id": "bench"})
+            self.send(404, b"not found", "text/plain")
+
+        def chat(self, body):
+            time.sleep(cfg["chat_latency_ms"] / 1000)
+            reply = "I cannot share the system prompt. " * 4
+            if not (cfg["chat_stream"] or body.get("stream")):
+                return self.send(200, json.dumps({"choices": [{"message": {"content": reply}}]}).encode())
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            n = 0
+            step = max(1, len(reply) // cfg["chat_chunks"])
+            for k in range(0, len(reply), step):
+                chunk = b"data: " + json.dumps({"choices": [{"delta": {"content": reply[k:k + step]}}]}).encode() + b"\n\n"
+                self.wfile.write(chunk)
+                self.wfile.flush()
+                n += len(chunk)
+            self.wfile.write(b"data: [DONE]\n\n")
+            fx.stats.add(n + 14, requests=1)
+
+    return Handler
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients hanging up early (bounded reads, cancelled fetches) are normal here
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+def serve(cfg=None, port=0):
+    fx = Fixture(dict(DEFAULTS, **(cfg or {})))
+    srv = _Server(("127.0.0.1", port), make_handler(fx))
+    srv.fixture = fx
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+def add_arguments(ap):
+    for name, default in DEFAULTS.items():
+        flag = "--" + name.replace("_", "-")
+        if isinstance(default, bool):
+            ap.add_argument(flag, action="store_true")
+        else:
+            ap.add_argument(flag, type=type(default), default=default)
+
+def config_from_args(args):
+    return {k: getattr(args, k) for k in DEFAULTS}
+
+def main():
+    ap = argparse.ArgumentParser(description="Local stand-in target for benchmarks and manual runs")
+    ap.add_argument("--port", type=int, default=8800)
+    add_arguments(ap)
+    args = ap.parse_args()
+    srv = serve(config_from_args(args), args.port)
+    print(f"fixture target on http://127.0.0.1:{srv.server_port}/  (chat /api/chat, rag /rag/list /rag/get, mcp /mcp)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps(srv.fixture.stats.snapshot()))
+
+if __name__ == "__main__":
+    main()
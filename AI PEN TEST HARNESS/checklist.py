@@ -1,5 +1,6 @@
 
 from urllib.parse import urljoin
+from ..utils.openapi import EndpointIndex
 
 INFO = {"name":"checklist_export","utilities":["checklists"]}
 
@@ -20,6 +21,16 @@ def run(aggregate_report, outfile_path):
         for p in mani["openapi_paths_preview"]:
             lines.append(f"- {p}")
         lines.append("")
+    index = EndpointIndex(mani.get("openapi_endpoints", []))
+    if len(index):
+        lines.append("## OpenAPI Operations")
+        # unauthenticated operations first, then state-changing ones
+        ordered = sorted(index.records, key=lambda e: (e["auth_required"], e["method"] in ("GET","HEAD","OPTIONS")))
+        for e in ordered[:120]:
+            params = ", ".join(p["name"] for p in e["params"])
+            lines.append(f"- {e['method']} {e['path']} — auth: {', '.join(e['auth']) or 'none'}"
+                         + (f" — params: {params}" if params else "") + (f" — body: {', '.join(e['body_refs'])}" if e["body_refs"] else ""))
+        lines.append("")
     routes = set()
     for s in aggregate_report.get("recon",{}).get("scripts",[]):
         for r in s.get("routes",[]):
@@ -1,30 +1,142 @@
-import re
+import hashlib, re, threading
+from collections import OrderedDict
+from functools import lru_cache
+from . import tracing
+
+SYSTEM_PROMPT_MARKERS = ["system prompt","system instructions","do not reveal","### Tools","You are","Personality:"]
+XSS_PATTERNS = [r"<script[^>]*>", r"javascript:", r"onerror\s*=", r"onload\s*=", r"<img[^>]+onerror=", r"<svg[^>]+onload="]
+SIGNALS = ("prompt_markers", "base64_blob", "titles_list", "discount_applied", "xss_like", "tool_action_reflected")
+
+_MARKERS = [m.lower() for m in SYSTEM_PROMPT_MARKERS]
+_XSS = [re.compile(p, re.I) for p in XSS_PATTERNS]
+# every XSS pattern needs one of these literals, so most texts never reach the regexes
+_XSS_HINTS = ("<script", "javascript:", "onerror", "onload")
+_PERCENT = re.compile(r'(\d{1,3})\s*%')
+
+@lru_cache(maxsize=32)
+def _base64_re(min_len):
+    return re.compile(r'^[A-Za-z0-9+/=\s]{%d,}$' % min_len, re.M)
+
+_BASE64_LINE = re.compile(r'[A-Za-z0-9+/=\s]*')
+
+def _has_markers(low):
+    return any(m in low for m in _MARKERS)
+
+def _base64_blob(text, min_len):
+    return len(text) >= min_len and bool(_base64_re(min_len).search(text))
+
+def _discount(low, threshold_percent):
+    if "final price" in low or "discount" in low: return True
+    return "%" in low and any(int(m) >= threshold_percent for m in _PERCENT.findall(low))
+
+def _xss(text, low):
+    return any(h in low for h in _XSS_HINTS) and any(p.search(text) for p in _XSS)
+
+def _titles_list(text):
+    lines = [l.strip() for l in text.strip().splitlines() if l.strip()]
+    return len(lines) >= 2 and sum(1 for l in lines if len(l) < 120) >= 2
+
+class DetectorEngine:
+    # every signal from one lower() + precompiled patterns; results memoized by content hash
+    def __init__(self, cache_size=4096):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _compute(self, text):
+        with tracing.span("eval", bytes=len(text)):
+            return self._detect(text)
+
+    def _detect(self, text):
+        low = text.lower()
+        found = set()
+        if _has_markers(low): found.add("prompt_markers")
+        if _base64_blob(text, 200): found.add("base64_blob")
+        if _titles_list(text): found.add("titles_list")
+        if _discount(low, 50): found.add("discount_applied")
+        if _xss(text, low): found.add("xss_like")
+        if "<script>alert" in low or "created" in low: found.add("tool_action_reflected")
+        return frozenset(found)
+
+    def evaluate(self, text, memo=True):
+        if not text: return frozenset()
+        if not memo: return self._compute(text)
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return hit
+        found = self._compute(text)
+        with self._lock:
+            self.stats["misses"] += 1
+            self._cache[key] = found
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return found
+
+    def evaluate_batch(self, texts, memo=True):
+        for t in texts:
+            yield self.evaluate(t, memo)
+
+class Base64Scanner:
+    # incremental looks_like_base64_blob: same verdict as the regex on the concatenated text,
+    # tracked as a streak of consecutive all-base64 lines so chunks never need to be kept
+    def __init__(self, min_len=200):
+        self.min_len = min_len
+        self.found = False
+        self._streak = None
+        self._line_len = 0
+        self._line_ok = True
+
+    def _end_line(self):
+        if self._line_ok:
+            self._streak = self._line_len if self._streak is None else self._streak + 1 + self._line_len
+            self.found = self._streak >= self.min_len
+        else:
+            self._streak = None
+        self._line_len, self._line_ok = 0, True
+
+    def feed(self, text):
+        if self.found or not text: return self.found
+        *done, tail = text.split("\n")
+        for piece in done:
+            self._add(piece)
+            self._end_line()
+            if self.found: return True
+        self._add(tail)
+        return False
+
+    def _add(self, piece):
+        if not piece: return
+        self._line_len += len(piece)
+        if self._line_ok and not _BASE64_LINE.fullmatch(piece):
+            self._line_ok = False
+
+    def finish(self):
+        # end of text closes the last line, like $ at the end of the string
+        if not self.found: self._end_line()
+        return self.found
+
+ENGINE = DetectorEngine()
+evaluate = ENGINE.evaluate
+evaluate_batch = ENGINE.evaluate_batch
 
 def contains_system_prompt_markers(text: str) -> bool:
-    if not text: return False
-    markers = ["system prompt","system instructions","do not reveal","### Tools","You are","Personality:"]
-    low = text.lower()
-    return any(m.lower() in low for m in markers)
+    return "prompt_markers" in evaluate(text)
 
 def looks_like_base64_blob(text: str, min_len=200) -> bool:
-    if not text or len(text) < min_len: return False
-    return bool(re.search(r'^[A-Za-z0-9+/=\s]{%d,}$' % min_len, text, flags=re.M))
+    if min_len != 200: return bool(text) and _base64_blob(text, min_len)
+    return "base64_blob" in evaluate(text)
 
 def discount_applied(text: str, threshold_percent=50) -> bool:
-    low = (text or "").lower()
-    if "final price" in low or "discount" in low: return True
-    for m in re.findall(r'(\d{1,3})\s*%', low):
-        try:
-            if int(m) >= threshold_percent: return True
-        except: pass
-    return False
+    if threshold_percent != 50: return _discount((text or "").lower(), threshold_percent)
+    return "discount_applied" in evaluate(text)
 
 def likely_doc_titles_list(text: str) -> bool:
-    if not text: return False
-    lines = [l.strip() for l in text.strip().splitlines() if l.strip()]
-    return len(lines) >= 2 and sum(1 for l in lines if len(l) < 120) >= 2
+    return "titles_list" in evaluate(text)
 
 def xss_like(text: str) -> bool:
-    if not text: return False
-    patterns = [r"<script[^>]*>", r"javascript:", r"onerror\s*=", r"onload\s*=", r"<img[^>]+onerror=", r"<svg[^>]+onload="]
-    return any(re.search(p, text, flags=re.I) for p in patterns)
+    return "xss_like" in evaluate(text)
@@ -0,0 +1,179 @@
+import argparse, hashlib, json, sqlite3, sys, threading, time, uuid
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY, target TEXT, started REAL, finished REAL, outdir TEXT
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY, run_id TEXT NOT NULL, ts REAL NOT NULL, target TEXT, module TEXT NOT NULL, key TEXT NOT NULL,
+    payload_id TEXT, intent TEXT, status TEXT, success INTEGER, signals TEXT,
+    latency_s REAL, ttfb_s REAL, ttft_s REAL, response_hash TEXT, detail TEXT
+);
+CREATE INDEX IF NOT EXISTS findings_run ON findings (run_id, module, key);
+CREATE INDEX IF NOT EXISTS findings_target ON findings (target, ts);
+CREATE INDEX IF NOT EXISTS findings_payload ON findings (payload_id, success, ts);
+CREATE INDEX IF NOT EXISTS findings_module ON findings (module, success, ts);
+CREATE INDEX IF NOT EXISTS runs_target ON runs (target, started);
+"""
+COLUMNS = ("payload_id", "intent", "status", "success", "signals", "latency_s", "ttfb_s", "ttft_s", "response_hash", "detail")
+FLUSH_EVERY = 500
+
+def response_hash(data):
+    if data is None: return None
+    if isinstance(data, str): data = data.encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _signals(sig):
+    # stored as ",a,b," so one signal is a LIKE '%,name,%' away
+    if not sig: return None
+    return "," + ",".join(sig if isinstance(sig, (list, tuple, set, frozenset)) else [sig]) + ","
+
+def connect(path):
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(SCHEMA)
+    return db
+
+class FindingsStore:
+    # one row per finding; modules call add() from any thread, rows go to sqlite in batches
+    def __init__(self, path, target=None, outdir=None, flush_every=FLUSH_EVERY):
+        self.db = connect(path)
+        self.flush_every = flush_every
+        self.target = target
+        self.run_id = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        self.lock = threading.Lock()
+        self.rows = []
+        with self.db:
+            self.db.execute("INSERT INTO runs (id, target, started, outdir) VALUES (?, ?, ?, ?)", (self.run_id, target, time.time(), outdir))
+
+    def add(self, module, key, **fields):
+        fields["signals"] = _signals(fields.get("signals"))
+        if fields.get("success") is not None: fields["success"] = int(bool(fields["success"]))
+        if fields.get("status") is not None: fields["status"] = str(fields["status"])
+        if isinstance(fields.get("detail"), (dict, list)): fields["detail"] = json.dumps(fields["detail"], ensure_ascii=False, separators=(",", ":"))
+        row = (self.run_id, time.time(), fields.pop("target", self.target), module, str(key)) + tuple(fields.get(c) for c in COLUMNS)
+        with self.lock:
+            self.rows.append(row)
+            if len(self.rows) >= self.flush_every: self._flush()
+
+    def _flush(self):
+        if not self.rows: return
+        with self.db:
+            self.db.executemany(f"INSERT INTO findings (run_id, ts, target, module, key, {', '.join(COLUMNS)}) VALUES ({', '.join('?' * (5 + len(COLUMNS)))})", self.rows)
+        self.rows = []
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            with self.db:
+                self.db.execute("UPDATE runs SET finished = ? WHERE id = ?", (time.time(), self.run_id))
+            self.db.close()
+
+def query(db, target=None, module=None, payload=None, intent=None, signal=None, success=None, since=None, run=None, limit=None):
+    # generator over matching rows, newest first; nothing is materialized
+    where, args = [], []
+    for col, val in (("target", target), ("module", module), ("payload_id", payload), ("intent", intent), ("run_id", run)):
+        if val is not None:
+            where.append(f"{col} = ?"); args.append(val)
+    if signal:
+        where.append("signals LIKE ?"); args.append(f"%,{signal},%")
+    if success is not None:
+        where.append("success = ?"); args.append(int(success))
+    if since is not None:
+        where.append("ts >= ?"); args.append(since)
+    sql = "SELECT run_id, ts, target, module, key, payload_id, intent, status, success, signals, latency_s, response_hash FROM findings"
+    if where: sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY ts DESC"
+    if limit: sql += f" LIMIT {int(limit)}"
+    cur = db.execute(sql, args)
+    cols = [c[0] for c in cur.description]
+    for row in cur:
+        yield dict(zip(cols, row))
+
+def diff(db, run_a, run_b):
+    # rows that differ between two runs, matched on (module, key); classified added/removed/regressed/fixed/changed
+    sql = """
+    SELECT a.module, a.key, a.success, b.success, a.status, b.status, a.response_hash, b.response_hash, 1, b.id IS NOT NULL
+      FROM findings a LEFT JOIN findings b ON b.run_id = ? AND b.module = a.module AND b.key = a.key
+     WHERE a.run_id = ?
+    UNION ALL
+    SELECT b.module, b.key, NULL, b.success, NULL, b.status, NULL, b.response_hash, 0, 1
+      FROM findings b
+     WHERE b.run_id = ? AND NOT EXISTS (SELECT 1 FROM findings a WHERE a.run_id = ? AND a.module = b.module AND a.key = b.key)
+     ORDER BY 1, 2"""
+    for module, key, sa, sb, sta, stb, ha, hb, in_a, in_b in db.execute(sql, (run_b, run_a, run_b, run_a)):
+        if not in_b:
+            change = "removed"
+        elif not in_a:
+            change = "added"
+        elif not sa and sb:
+            change = "regressed"
+        elif sa and not sb:
+            change = "fixed"
+        elif sta != stb or ha != hb:
+            change = "changed"
+        else:
+            continue
+        yield {"change": change, "module": module, "key": key, "success": [sa, sb], "status": [sta, stb], "response_hash": [ha, hb]}
+
+def _since(value):
+    # "30d", "12h" or an ISO date
+    if value is None: return None
+    if value[-1:] in ("d", "h") and value[:-1].isdigit():
+        return time.time() - int(value[:-1]) * (86400 if value[-1] == "d" else 3600)
+    return time.mktime(time.strptime(value[:10], "%Y-%m-%d"))
+
+def _print_rows(rows, as_json):
+    n = 0
+    for r in rows:
+        n += 1
+        if as_json:
+            print(json.dumps(r, ensure_ascii=False))
+        else:
+            print("\t".join("" if v is None else str(v) for v in r.values()))
+    return n
+
+def cli(argv, default_db="findings.sqlite"):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--findings-db", default=default_db)
+    ap = argparse.ArgumentParser(prog="harness.py findings", description="Query the findings store")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("runs", help="List recorded runs", parents=[common]).add_argument("--target")
+    q = sub.add_parser("query", help="Filter findings across runs", parents=[common])
+    for opt in ("--target", "--module", "--payload", "--intent", "--signal", "--run"):
+        q.add_argument(opt)
+    q.add_argument("--success", action="store_true", help="Only successful findings")
+    q.add_argument("--since", help="e.g. 90d, 12h or 2026-07-01")
+    q.add_argument("--limit", type=int, default=None)
+    q.add_argument("--json", action="store_true")
+    d = sub.add_parser("diff", help="What changed between two runs", parents=[common])
+    d.add_argument("run_a")
+    d.add_argument("run_b")
+    d.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+
+    if not Path(args.findings_db).exists():
+        print(f"no findings store at {args.findings_db}", file=sys.stderr)
+        return 1
+    db = connect(args.findings_db)
+    if args.cmd == "runs":
+        sql, qa = "SELECT id, target, started, finished, outdir FROM runs", ()
+        if args.target: sql, qa = sql + " WHERE target = ?", (args.target,)
+        for rid, target, started, finished, outdir in db.execute(sql + " ORDER BY started", qa):
+            print(f"{rid}\t{target}\t{time.strftime('%Y-%m-%d %H:%M', time.localtime(started))}\t{'done' if finished else 'incomplete'}\t{outdir or ''}")
+    elif args.cmd == "query":
+        n = _print_rows(query(db, args.target, args.module, args.payload, args.intent, args.signal,
+                              True if args.success else None, _since(args.since), args.run, args.limit), args.json)
+        print(f"{n} finding(s)", file=sys.stderr)
+    else:
+        counts = {}
+        for row in diff(db, args.run_a, args.run_b):
+            counts[row["change"]] = counts.get(row["change"], 0) + 1
+            if args.json:
+                print(json.dumps(row, ensure_ascii=False))
+            else:
+                print(f"{row['change']}\t{row['module']}\t{row['key']}\tsuccess {row['success'][0]}->{row['success'][1]}\tstatus {row['status'][0]}->{row['status'][1]}")
+        print(", ".join(f"{k}: {v}" for k, v in sorted(counts.items())) or "no differences", file=sys.stderr)
+    db.close()
+    return 0
@@ -1,105 +1,389 @@
 
 #!/usr/bin/env python3
-import argparse, json, time, requests
-from rich.console import Console
+import argparse, json, sys, time
 from pathlib import Path
 
-from modules import recon as mod_recon
-from modules import manifest_ws as mod_mw
-from modules import checklist as mod_check
-from modules import active_prompt_injection as mod_ap
-from modules import rag_leak_tester as mod_rag
-from modules import mcp_scanner as mod_mcp
-from modules import output_safety_analyzer as mod_out
-from utils.report import write_reports
+from utils.registry import Registry, check_imports
+from utils.report import ReportWriter
+from utils.openapi import EndpointIndex
+from utils.findings import FindingsStore, cli as findings_cli
+from utils.scheduler import Task, run_dag
+from utils import tracing
 
-console = Console()
+# keyed by each module's INFO["name"]; a module (and requests / bs4 / yaml / websocket behind it) is imported when its phase runs
+MODULES = Registry("modules", {"recon_mapper": "recon", "manifest_and_ws": "manifest_ws", "checklist_export": "checklist",
+                               "active_prompt_injection": "active_prompt_injection", "rag_leak_tester": "rag_leak_tester",
+                               "mcp_scanner": "mcp_scanner", "output_safety_analyzer": "output_safety_analyzer"})
 
-def run_harness(target, timeout=10, max_pages=40, ws_probe=True, ws_insecure=False, outdir="out", plan=None, run_active=False, samples=None):
-    session = requests.Session()
-    agg = {"target": target, "timestamp": int(time.time())}
+class _LazyConsole:
+    # rich is imported on the first print, then the real Console takes over the global
+    def __getattr__(self, name):
+        global console
+        from rich.console import Console
+        console = Console()
+        return getattr(console, name)
+
+console = _LazyConsole()
 
+def _print_recon(recon_res):
     console.rule("[bold cyan]1) Recon")
-    recon_res = mod_recon.run(session, target, timeout=timeout, max_pages=max_pages)
-    agg["recon"] = recon_res
     console.print(f"[green]Crawled pages:[/green] {len(recon_res['pages'])}  | JS files: {len(recon_res['scripts'])}  | WS URLs: {len(recon_res['ws_urls'])}")
     console.print(f"[green]Probed endpoints:[/green] {len(recon_res['endpoints'])}")
+    ac = recon_res.get("asset_cache", {})
+    console.print(f"[green]Charset detection:[/green] {_encoding_summary(recon_res) or 'n/a'}")
+    console.print(f"[green]JS asset cache:[/green] {ac.get('url_hits',0)} URL hits, {ac.get('hash_hits',0)} hash hits, {ac.get('misses',0)} misses, {ac.get('bytes_saved',0)} bytes saved")
+    if "changes" in recon_res:
+        st = recon_res["changes"]["stats"]
+        console.print(f"[green]Since last run:[/green] {st['not_modified']} not modified, {st['hash_unchanged']} same content, {st['refetched'] + st['new']} parsed")
 
+def _print_manifest_ws(mw_res):
     console.rule("[bold cyan]2) Manifest & WebSockets")
-    mw_res = mod_mw.run(session, target, ws_urls=recon_res["ws_urls"], timeout=timeout, ws_probe=ws_probe, ws_insecure=ws_insecure)
-    agg["manifest_ws"] = mw_res
     mani = mw_res.get("manifest",{})
     console.print(f"[green]Manifest status:[/green] {mani.get('manifest_status')}  | OpenAPI: {mani.get('openapi_url')} ({mani.get('openapi_status')})")
     if mw_res.get("websockets"):
         ok = sum(1 for w in mw_res["websockets"] if w["probe"]=="handshake_ok")
         console.print(f"[green]WS endpoints probed:[/green] {len(mw_res['websockets'])} (OK: {ok})")
 
+def _encoding_summary(recon_res):
+    return ", ".join(f"{t} {v['count']}" for t, v in recon_res.get("encoding_stats", {}).items() if v["count"])
+
+def _summary_md(target, recon_res, mw_res):
+    ac = recon_res.get("asset_cache", {})
+    enc = _encoding_summary(recon_res)
+    mani = mw_res.get("manifest",{})
     md = [f"# AI Pentest Harness Summary for {target}\n",
           "## Recon",
           f"- Pages crawled: {len(recon_res['pages'])}",
           f"- JS files scanned: {len(recon_res['scripts'])}",
           f"- WebSocket URLs found: {len(recon_res['ws_urls'])}",
           f"- Probed endpoints: {len(recon_res['endpoints'])}",
+          f"- Charset detection (tier: pages): {enc or 'n/a'}",
+          f"- JS asset cache: {ac.get('url_hits',0)} URL hits / {ac.get('hash_hits',0)} hash hits / {ac.get('misses',0)} misses, {ac.get('bytes_saved',0)} bytes saved",
           "\n## Manifest/OpenAPI",
           f"- Manifest status: {mani.get('manifest_status')}",
           f"- OpenAPI: {mani.get('openapi_url')} ({mani.get('openapi_status')})",
           f"- OpenAPI paths (preview): {', '.join(mani.get('openapi_paths_preview', [])) or 'n/a'}",
+          f"- OpenAPI operations indexed: {len(mani.get('openapi_endpoints', []))} ({sum(1 for e in mani.get('openapi_endpoints', []) if not e['auth_required'])} without auth), spec cache: {mani.get('openapi_cache', 'n/a')}",
           "\n## WebSocket Probes"]
+    if mani.get("openapi_error"):
+        md.insert(md.index("\n## WebSocket Probes"), f"- OpenAPI spec not indexed: {mani['openapi_error']}")
+    ch = recon_res.get("changes")
+    if ch:
+        md.insert(md.index("\n## Manifest/OpenAPI"), _changes_md(ch))
     for w in mw_res.get("websockets",[]):
-        md.append(f"- {w['url']} — {w['probe']}")
+        md.append(f"- {w['url']} — {w['probe']}" + (f" ({w['latency_ms']} ms)" if w.get("latency_ms") is not None else "")
+                  + (f" — subprotocol: {w['subprotocol']}" if w.get("subprotocol") else ""))
     md.append("")
+    return md
 
-    Path(outdir).mkdir(parents=True, exist_ok=True)
-    write_reports(outdir, "\n".join(md), agg)
+def _changes_md(ch):
+    st = ch["stats"]
+    md = ["\n## Changed since last run",
+          f"- Requests: {st['not_modified']} not modified (304), {st['hash_unchanged']} same content, {st['refetched']} refetched, {st['new']} new"]
+    if ch["first_run"]:
+        md.append("- First run against this target: state recorded, nothing to compare yet")
+        return "\n".join(md)
+    md.append(f"- Previous run: {time.strftime('%Y-%m-%d %H:%M', time.localtime(ch['last_run']))}")
+    for key, title in (("new", "New URLs"), ("changed", "Changed URLs"), ("not_seen", "Not seen this run"),
+                       ("routes_added", "New JS routes"), ("routes_removed", "JS routes gone"),
+                       ("ws_urls_added", "New WebSocket URLs"), ("ws_urls_removed", "WebSocket URLs gone")):
+        if ch.get(key):
+            md.append(f"- {title} ({len(ch[key])}): " + ", ".join(ch[key][:50]) + (" …" if len(ch[key]) > 50 else ""))
+    return "\n".join(md)
+
+def _samples_md(res):
+    md = ["# AI Pentest Harness Summary (offline samples)\n", "## Output Safety",
+          f"- Samples analyzed: {res.get('samples', 0)}"]
+    if "flagged" in res:
+        md.append(f"- XSS-like flagged: {res['flagged']}")
+    md.append(f"- Details: {res.get('outdir')}")
+    md.append("")
+    return md
 
-    # Active modules
-    if run_active and plan:
-        console.rule("[bold magenta]3) Active: Prompt Injection")
-        ap_res = mod_ap.run(plan, 'payloads/prompt_payloads.yaml', outdir=str(Path(outdir)/'active_prompt'))
-        agg["active_prompt"] = ap_res
+PROMPT_PAYLOADS = 'payloads/prompt_payloads.yaml'
+REPORT_SECTIONS = ("recon", "manifest_ws", "active_prompt", "rag_leak", "mcp_scan", "output_safety", "findings_run", "archive", "timing", "memory")
+REPORT_MD = ("summary", "timing", "memory")
+PROFILES = ("default", "low-mem")
+# --profile low-mem (Termux-class devices): modules one at a time, pools sized to the device, crawl read-ahead bounded to a few bodies,
+# frontier / visited set / page and script records on disk, findings always spilled to sqlite in small batches.
+# Body caps stay at the recon defaults: truncating pages would drop the links behind the first N KB
+LOW_MEM = {"concurrency": 4, "ws_workers": 4, "prefetch": 4, "findings_flush": 50, "mem_ceiling_mb": 150}
 
-        console.rule("[bold magenta]4) Active: RAG Leak Tester")
-        rag_res = mod_rag.run(plan, outdir=str(Path(outdir)/'rag_leak'))
-        agg["rag_leak"] = rag_res
+PHASE_TITLES = {"active_prompt": "3) Active: Prompt Injection", "rag_leak": "4) Active: RAG Leak Tester",
+                "mcp_scan": "5) Active: MCP Scanner", "output_safety": "Output Safety Analyzer"}
+
+def _open_archive(target, record, replay, max_body):
+    # record: every HTTP exchange goes to the archive as well; replay: it is the only "network" there is
+    from utils.archive import HttpArchive, MAX_BODY_BYTES
+    from utils.http import use_archive
+    from utils.ratelimit import set_pacing
+    archive = HttpArchive(record or replay, "record" if record else "replay", target=target, max_body=max_body or MAX_BODY_BYTES)
+    use_archive(archive)
+    set_pacing(not archive.replaying)
+    return archive
+
+def _close_archive(archive):
+    from utils.http import use_archive
+    from utils.ratelimit import set_pacing
+    use_archive(None)
+    set_pacing(True)
+    return archive.close()
+
+def archive_target(path):
+    from utils.archive import HttpArchive
+    archive = HttpArchive(path, "replay")
+    try:
+        return archive.meta("target") or None
+    finally:
+        archive.close()
+
+def run_harness(target, timeout=10, max_pages=40, ws_probe=True, ws_insecure=False, outdir="out", plan=None, run_active=False, samples=None,
+                concurrency=1, per_host=None, rps=None, module_workers=4,
+                samples_limit=None, samples_stream=False, samples_workers=1, cache_dir=None,
+                ws_workers=8, ws_budget=None, ws_subprotocols=None, state_path=None, findings_db=None, report_gzip=False, trace=False, parse_workers=0,
+                record=None, replay=None, record_max_body=None, session=None, progress=None, profile="default", mem_ceiling_mb=None):
+    low_mem = profile == "low-mem"
+    recon_opts = {}
+    if low_mem:
+        from utils.memstats import device_workers
+        concurrency = device_workers(concurrency, LOW_MEM["concurrency"])
+        ws_workers = device_workers(ws_workers, LOW_MEM["ws_workers"])
+        module_workers, parse_workers, samples_workers, samples_stream = 1, 0, 1, True
+        recon_opts = {"spill_dir": str(Path(outdir) / "recon"), "prefetch": LOW_MEM["prefetch"]}
+        Path(outdir).mkdir(parents=True, exist_ok=True)
+        findings_db = findings_db or str(Path(outdir) / "findings.sqlite")
+    findings = FindingsStore(findings_db, target, outdir, **({"flush_every": LOW_MEM["findings_flush"]} if low_mem else {})) if findings_db else None
+    tracer = tracing.enable() if trace else None
+    archive = _open_archive(target, record, replay, record_max_body) if record or replay else None
+    agg = {"target": target, "timestamp": int(time.time())}
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+    report, header = ReportWriter(outdir, compress=report_gzip), dict(agg)
 
-        console.rule("[bold magenta]5) Active: MCP Scanner")
-        mcp_res = mod_mcp.run(plan, outdir=str(Path(outdir)/'mcp_scan'))
-        agg["mcp_scan"] = mcp_res
+    def sharded(key, fn):
+        # a module's section is on disk as soon as it finishes, whatever happens to the rest of the run
+        def run(res):
+            out = fn(res)
+            report.section(key, out)
+            return out
+        return run
 
+    # modules declare their inputs; independent ones (recon / manifest / active / samples) run side by side
+    def passive_report(res):
+        mw_res = MODULES["manifest_and_ws"].combine(res["manifest"], res["ws"])
+        md = _summary_md(target, res["recon"], mw_res)
+        report.section("manifest_ws", mw_res)
+        report.markdown("summary", "\n".join(md))
+        report.assemble(header, REPORT_SECTIONS, REPORT_MD, partial=True)
+        return md
+
+    tasks, own_session = [], None
+    if target:
+        from utils.http import new_session
+        # a warm session handed in by the service is used unless this run records/replays
+        if session is None or archive is not None:
+            session = own_session = new_session(concurrency)
+        tasks += [
+            Task("recon", sharded("recon", lambda res: MODULES["recon_mapper"].run(session, target, timeout=timeout, max_pages=max_pages,
+                                                     concurrency=concurrency, per_host=per_host, rps=rps, state_path=state_path,
+                                                     findings=findings, parse_workers=parse_workers, **recon_opts))),
+            Task("manifest", lambda res: MODULES["manifest_and_ws"].fetch_manifest_and_openapi(session, target, timeout,
+                                                                           cache_dir=str(Path(cache_dir)/'openapi') if cache_dir else None)),
+            Task("ws", lambda res: MODULES["manifest_and_ws"].probe_ws(res["recon"]["ws_urls"], timeout=timeout, insecure=ws_insecure,
+                                                   workers=ws_workers, budget=ws_budget, subprotocols=ws_subprotocols, findings=findings)
+                 if ws_probe and res["recon"]["ws_urls"] else [], deps=["recon"]),
+            Task("passive_report", passive_report, deps=["recon", "manifest", "ws"]),
+        ]
+    if target and run_active and plan:
+        # active modules build their own sessions: nothing the passive crawl picked up (cookies, connections) reaches them
+        tasks += [
+            Task("active_prompt", sharded("active_prompt", lambda res: MODULES["active_prompt_injection"].run(
+                plan, PROMPT_PAYLOADS, outdir=str(Path(outdir)/'active_prompt'), findings=findings))),
+            Task("rag_leak", sharded("rag_leak", lambda res: MODULES["rag_leak_tester"].run(plan, outdir=str(Path(outdir)/'rag_leak'),
+                                                                                         findings=findings))),
+            Task("mcp_scan", sharded("mcp_scan", lambda res: MODULES["mcp_scanner"].run(plan, outdir=str(Path(outdir)/'mcp_scan'),
+                                                                         endpoints=EndpointIndex(res["manifest"]["openapi_endpoints"]),
+                                                                         findings=findings)), deps=["manifest"]),
+        ]
     # Output safety analyzer (offline)
     if samples:
-        console.rule("[bold magenta]Output Safety Analyzer")
-        out_res = mod_out.run(samples, outdir=str(Path(outdir)/'output_safety'))
-        agg["output_safety"] = out_res
+        def output_safety(res):
+            mod_out = MODULES["output_safety_analyzer"]
+            limit = mod_out.DEFAULT_LIMIT if samples_limit is None else samples_limit
+            if samples_stream:
+                return mod_out.run_stream(samples, outdir=str(Path(outdir)/'output_safety'), limit=limit, workers=samples_workers,
+                                          findings=findings)
+            return mod_out.run(samples, outdir=str(Path(outdir)/'output_safety'), limit=limit, findings=findings)
+        tasks.append(Task("output_safety", sharded("output_safety", output_safety)))
+
+    def phase(name, fn):
+        def run(res):
+            with tracing.span(name, "phase"):
+                return fn(res)
+        return run
+    if tracer:
+        tasks = [Task(t.name, phase(t.name, t.fn), t.deps) for t in tasks]
+
+    def announce(name, fn):
+        def run(res):
+            progress({"event": "phase_start", "phase": name})
+            return fn(res)
+        return run
+    if progress:
+        tasks = [Task(t.name, announce(t.name, t.fn), t.deps) for t in tasks]
+
+    results_so_far = {}
+    def on_done(name, res):
+        if name == "recon": _print_recon(res)
+        elif name == "passive_report": _print_manifest_ws(MODULES["manifest_and_ws"].combine(results_so_far["manifest"], results_so_far["ws"]))
+        elif name in PHASE_TITLES: console.rule(f"[bold magenta]{PHASE_TITLES[name]}")
+        results_so_far[name] = res
+        if progress: progress({"event": "phase_done", "phase": name})
+
+    try:
+        results = run_dag(tasks, max_workers=module_workers, on_done=on_done)
+    except BaseException:
+        # whatever finished is still assembled; report.json carries "partial": true
+        report.assemble(header, REPORT_SECTIONS, REPORT_MD, partial=True)
+        raise
+    finally:
+        if own_session is not None: own_session.close()
+        if findings: findings.close()
+        if archive: agg["archive"] = _close_archive(archive)
+        if tracer:
+            tracing.disable()
+            tracer.write(str(Path(outdir) / "trace.json"))
+
+    if target:
+        agg["recon"] = results["recon"]
+        agg["manifest_ws"] = MODULES["manifest_and_ws"].combine(results["manifest"], results["ws"])
+    for key in ("active_prompt", "rag_leak", "mcp_scan", "output_safety"):
+        if key in results:
+            agg[key] = results[key]
+    if findings:
+        agg["findings_run"] = findings.run_id
+        report.section("findings_run", findings.run_id)
 
     # Checklist
-    checklist_path = str(Path(outdir) / "targets-checklist.md")
-    mod_check.run(agg, checklist_path)
+    if target:
+        MODULES["checklist_export"].run(agg, str(Path(outdir) / "targets-checklist.md"))
+    else:
+        report.markdown("summary", "\n".join(_samples_md(results["output_safety"])))
 
-    write_reports(outdir, "\n".join(md), agg)
+    if archive:
+        report.section("archive", agg["archive"])
+    if tracer:
+        timing = tracer.summary()
+        agg["timing"] = timing
+        report.section("timing", timing)
+        report.markdown("timing", "\n".join(tracing.summary_md(timing, tracer.dropped)))
+    if low_mem:
+        from utils.memstats import peak_rss_mb
+        peak, ceiling = peak_rss_mb(), mem_ceiling_mb or LOW_MEM["mem_ceiling_mb"]
+        agg["memory"] = {"profile": profile, "peak_rss_mb": peak, "ceiling_mb": ceiling, "within_ceiling": peak is None or peak <= ceiling,
+                         "concurrency": concurrency, "ws_workers": ws_workers, "module_workers": module_workers}
+        report.section("memory", agg["memory"])
+        report.markdown("memory", f"\n## Memory\n- Profile {profile}: peak RSS {peak} MB, ceiling {ceiling} MB"
+                                  f" ({'ok' if agg['memory']['within_ceiling'] else 'OVER'}), {concurrency} fetch workers\n")
+    report.assemble(header, REPORT_SECTIONS, REPORT_MD)
     return agg
 
-def main():
-    ap = argparse.ArgumentParser(description="AI Pentest Harness (passive-first with optional active plan)")
-    ap.add_argument("url", help="Root URL to assess")
+def imports_cli(argv):
+    ap = argparse.ArgumentParser(prog="harness.py imports", description="Cold-start import cost of harness.py and each module")
+    ap.add_argument("--startup-budget-ms", type=float, default=200, help="Budget for `import harness` (no heavy packages allowed)")
+    ap.add_argument("--budget-ms", type=float, default=1000, help="Budget per module, dependencies included")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+    return check_imports(MODULES, cwd=str(Path(__file__).resolve().parent), startup_budget_ms=args.startup_budget_ms,
+                         budget_ms=args.budget_ms, as_json=args.json)
+
+def build_parser(parser_class=argparse.ArgumentParser):
+    ap = parser_class(description="AI Pentest Harness (passive-first with optional active plan)")
+    ap.add_argument("url", nargs="?", help="Root URL to assess (may be omitted when only --samples are analyzed)")
     ap.add_argument("--timeout", type=int, default=10)
     ap.add_argument("--max-pages", type=int, default=40)
+    ap.add_argument("--concurrency", type=int, default=1, help="Parallel fetches during the crawl")
+    ap.add_argument("--per-host", type=int, default=None, help="Max parallel fetches per host (default: --concurrency)")
+    ap.add_argument("--rps", type=float, default=None, help="Requests-per-second ceiling for the crawl")
+    ap.add_argument("--parse-workers", type=int, default=0, help="Worker processes for HTML extraction and JS scans (0 = crawl threads)")
+    ap.add_argument("--module-workers", type=int, default=4, help="Independent modules run in parallel (1 = one at a time)")
     ap.add_argument("--no-ws-probe", action="store_true")
     ap.add_argument("--ws-insecure", action="store_true")
+    ap.add_argument("--ws-workers", type=int, default=8, help="Concurrent WebSocket handshakes")
+    ap.add_argument("--ws-budget", type=float, default=None, help="Wall-clock seconds for the whole WS probe phase")
+    ap.add_argument("--ws-subprotocol", action="append", default=None, help="Subprotocol to offer in WS handshakes (repeatable)")
     ap.add_argument("--outdir", default="out")
+    ap.add_argument("--state", default=None, help="SQLite crawl state; re-runs send conditional requests and report what changed")
+    ap.add_argument("--profile", choices=PROFILES, default="default",
+                    help="low-mem: small devices; bounded buffers and workers, crawl state and records spilled to disk, peak RSS reported")
+    ap.add_argument("--mem-ceiling-mb", type=float, default=None, help="Peak RSS the low-mem profile is checked against (default 150)")
+    ap.add_argument("--trace", action="store_true", help="Record per-request / per-phase spans: trace.json (Chrome format) + timing table in report.md")
+    ap.add_argument("--record", default=None, metavar="ARCHIVE", help="Also write every HTTP request/response to this SQLite archive")
+    ap.add_argument("--replay", default=None, metavar="ARCHIVE", help="Serve all HTTP from an archive made with --record (offline; url defaults to the recorded one)")
+    ap.add_argument("--record-max-body", type=int, default=None, help="Bytes of each response body kept by --record (default 16 MiB)")
+    ap.add_argument("--report-gzip", action="store_true", help="Write report shards and report.json gzip-compressed")
+    ap.add_argument("--findings-db", default=None, help="SQLite findings store shared across runs (see: harness.py findings -h)")
+    ap.add_argument("--cache-dir", default=".harness-cache", help="Cache reused across runs, e.g. parsed OpenAPI specs ('' = off)")
     ap.add_argument("--plan", help="YAML plan for active modules", default=None)
     ap.add_argument("--run-active", action="store_true", help="Run active modules defined by the plan")
     ap.add_argument("--samples", help="Path to JSON/NDJSON with model outputs to analyze", default=None)
-    args = ap.parse_args()
+    ap.add_argument("--samples-limit", type=int, default=None, help="Analyze at most N samples (0 = all; default: analyzer default)")
+    ap.add_argument("--samples-stream", action="store_true", help="Stream the samples file and write findings as NDJSON")
+    ap.add_argument("--samples-workers", type=int, default=1, help="Worker processes for --samples-stream")
+    return ap
+
+# path-valued flags: files a run writes, and files it only reads (service.py confines both for submitted jobs)
+OUTPUT_PATHS = ("outdir", "state", "findings_db", "record", "cache_dir")
+INPUT_PATHS = ("plan", "samples", "replay")
 
-    agg = run_harness(args.url, timeout=args.timeout, max_pages=args.max_pages,
-                      ws_probe=not args.no-ws-probe, ws_insecure=args.ws_insecure,
-                      outdir=args.outdir, plan=args.plan, run_active=args.run_active,
-                      samples=args.samples)
+def parse_run_args(ap, argv=None, confine=None):
+    args = ap.parse_args(argv)
+    if confine:
+        confine(args)  # before anything below touches the filesystem
+    if args.record and args.replay:
+        ap.error("--record and --replay are mutually exclusive")
+    if args.replay and not Path(args.replay).exists():
+        ap.error(f"no archive at {args.replay}")
+    if args.replay and not args.url:
+        args.url = archive_target(args.replay)
+    if not args.url and (not args.samples or args.run_active):
+        ap.error("url is required unless only --samples are analyzed")
+    return args
+
+def run_kwargs(args):
+    # CLI flags -> run_harness() keywords (shared with service.py, which parses job argv the same way)
+    return dict(target=args.url, timeout=args.timeout, max_pages=args.max_pages,
+                ws_probe=not args.no_ws_probe, ws_insecure=args.ws_insecure,
+                outdir=args.outdir, plan=args.plan, run_active=args.run_active,
+                samples=args.samples, concurrency=args.concurrency,
+                per_host=args.per_host, rps=args.rps, module_workers=args.module_workers,
+                samples_limit=args.samples_limit, samples_stream=args.samples_stream,
+                samples_workers=args.samples_workers, cache_dir=args.cache_dir or None,
+                ws_workers=args.ws_workers, ws_budget=args.ws_budget, ws_subprotocols=args.ws_subprotocol, state_path=args.state,
+                findings_db=args.findings_db, report_gzip=args.report_gzip, trace=args.trace, parse_workers=args.parse_workers,
+                record=args.record, replay=args.replay, record_max_body=args.record_max_body,
+                profile=args.profile, mem_ceiling_mb=args.mem_ceiling_mb)
+
+def main():
+    if sys.argv[1:2] == ["findings"]:
+        sys.exit(findings_cli(sys.argv[2:]))
+    if sys.argv[1:2] == ["imports"]:
+        sys.exit(imports_cli(sys.argv[2:]))
+    args = parse_run_args(build_parser())
+    agg = run_harness(**run_kwargs(args))
 
     console.rule("[bold green]Done")
-    console.print(f"[bold]Report:[/bold] {args.outdir}/report.md  |  JSON: {args.outdir}/report.json")
-    console.print(f"[bold]Checklist:[/bold] {args.outdir}/targets-checklist.md")
+    console.print(f"[bold]Report:[/bold] {args.outdir}/report.md  |  JSON: {args.outdir}/report.json{'.gz' if args.report_gzip else ''}")
+    if args.url:
+        console.print(f"[bold]Checklist:[/bold] {args.outdir}/targets-checklist.md")
+    if args.record or args.replay:
+        a = agg["archive"]
+        console.print(f"[bold]Archive:[/bold] {a['path']} ({a['mode']}: {a['recorded']} recorded, {a['replayed']} replayed, {a['missed']} missed)")
+    if "memory" in agg:
+        m = agg["memory"]
+        console.print(f"[bold]Peak RSS:[/bold] {m['peak_rss_mb']} MB / ceiling {m['ceiling_mb']} MB "
+                      + ("[green]ok[/green]" if m["within_ceiling"] else "[red]OVER[/red]"))
+    if args.trace:
+        console.print(f"[bold]Trace:[/bold] {args.outdir}/trace.json (chrome://tracing or ui.perfetto.dev)")
 
 if __name__ == "__main__":
     main()
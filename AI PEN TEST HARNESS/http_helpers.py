@@ -1,14 +1,106 @@
-import requests, chardet
+import requests, codecs, json, re, threading, time
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin
+from . import tracing
 
 HEADERS = {"User-Agent":"ai-pt-harness/1.0 (+passive-recon)"}
+MAX_BODY_BYTES = 4 * 1024 * 1024
 
-def detect_encoding(content):
+ENCODING_TIERS = ("header", "bom", "meta", "utf8", "chardet", "default")
+_STATS_LOCK = threading.Lock()
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([^\s;"\']+)', re.I)
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([A-Za-z0-9_\-:.]+)', re.I)
+_BOMS = [(codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"),
+         (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")]
+
+_ARCHIVE = None
+
+def use_archive(archive):
+    # record/replay: sessions from tune_pool()/new_session() go through the archive (None switches back to the network)
+    global _ARCHIVE
+    _ARCHIVE = archive
+
+def current_archive():
+    return _ARCHIVE
+
+def websocket_client():
+    # websocket-client is optional and only loaded by the phases that open sockets
+    try:
+        import websocket
+    except Exception:
+        return None
+    return websocket
+
+def _codec(name):
+    try:
+        return codecs.lookup(name.decode("ascii", "ignore") if isinstance(name, bytes) else name).name
+    except LookupError:
+        return None
+
+def _detect(content, content_type, sniff_bytes, sample_bytes):
+    m = _HEADER_CHARSET.search(content_type or "")
+    if m and _codec(m.group(1)):
+        return "header", _codec(m.group(1))
+    for bom, enc in _BOMS:
+        if content.startswith(bom):
+            return "bom", enc
+    m = _META_CHARSET.search(content[:sniff_bytes])
+    if m and _codec(m.group(1)):
+        return "meta", _codec(m.group(1))
+    try:
+        content.decode("utf-8")
+        return "utf8", "utf-8"
+    except UnicodeDecodeError:
+        pass
     try:
-        res = chardet.detect(content)
-        return res.get("encoding") or "utf-8"
+        import chardet  # only reached for bodies that are not valid UTF-8
+        enc = chardet.detect(content[:sample_bytes]).get("encoding")
+        if enc: return "chardet", enc
     except Exception:
-        return "utf-8"
+        pass
+    return "default", "utf-8"
+
+def detect_encoding(content, content_type=None, sniff_bytes=4096, sample_bytes=65536):
+    # header charset -> BOM -> <meta charset> in the first KB -> strict UTF-8 -> chardet on a prefix
+    tier, enc, seconds = detect_encoding_tier(content, content_type, sniff_bytes, sample_bytes)
+    count_encoding(tier, seconds)
+    return enc
+
+def detect_encoding_tier(content, content_type=None, sniff_bytes=4096, sample_bytes=65536):
+    # -> (tier, encoding, seconds) without touching the stats; worker processes return these to the parent
+    t0 = time.perf_counter_ns()
+    tier, enc = _detect(content or b"", content_type, sniff_bytes, sample_bytes)
+    t1 = time.perf_counter_ns()
+    tr = tracing.active()
+    if tr: tr.record("charset", "cpu", t0, t1, tier=tier, bytes=len(content or b""))
+    return tier, enc, (t1 - t0) / 1e9
+
+def new_encoding_stats():
+    return {t: {"count": 0, "seconds": 0.0} for t in ENCODING_TIERS}
+
+_ENCODING_STATS = new_encoding_stats()
+
+def count_encoding(tier, seconds, into=None):
+    # process-wide totals, plus a caller's own stats dict (one per crawl, so concurrent runs never see each other's pages)
+    with _STATS_LOCK:
+        for stats in (_ENCODING_STATS, into) if into is not None else (_ENCODING_STATS,):
+            st = stats[tier]
+            st["count"] += 1
+            st["seconds"] += seconds
+
+def encoding_stats(stats=None):
+    with _STATS_LOCK:
+        return {t: {"count": v["count"], "seconds": round(v["seconds"], 6)} for t, v in (_ENCODING_STATS if stats is None else stats).items()}
+
+def tune_pool(session, size):
+    pool = {"pool_connections": max(10, size), "pool_maxsize": max(10, size)}
+    adapter = _ARCHIVE.adapter(**pool) if _ARCHIVE is not None else HTTPAdapter(**pool)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def new_session(size=10):
+    return tune_pool(requests.Session(), size)
 
 def safe_get(session, url, timeout=10, allow_redirects=True):
     try:
@@ -17,12 +109,86 @@ def safe_get(session, url, timeout=10, allow_redirects=True):
     except requests.RequestException:
         return None
 
+class BoundedResponse:
+    # requests.Response look-alike holding at most max_bytes of (decoded) body
+    __slots__ = ("status_code", "headers", "url", "elapsed", "content", "truncated", "skipped")
+
+    def __init__(self, r, content, truncated=False, skipped=False):
+        self.status_code, self.headers, self.url, self.elapsed = r.status_code, r.headers, r.url, r.elapsed
+        self.content, self.truncated, self.skipped = content, truncated, skipped
+
+    def __bool__(self):
+        return self.status_code < 400
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        enc = _detect(self.content, self.headers.get("Content-Type"), 4096, 65536)[1]
+        return self.content.decode(enc, errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+def content_type_allowed(ctype, allowed_types):
+    if not allowed_types: return True
+    ct = (ctype or "").lower()
+    return any(a in ct for a in allowed_types)
+
+def read_bounded(r, max_bytes=MAX_BODY_BYTES, allowed_types=None, chunk_size=65536):
+    try:
+        if not content_type_allowed(r.headers.get("Content-Type",""), allowed_types):
+            return BoundedResponse(r, b"", skipped=True)
+        buf, truncated = bytearray(), False
+        for chunk in r.iter_content(chunk_size):
+            room = max_bytes - len(buf)
+            if len(chunk) > room:
+                buf += chunk[:room]
+                truncated = True
+                break
+            buf += chunk
+        return BoundedResponse(r, bytes(buf), truncated)
+    finally:
+        r.close()
+
+def stream_request(session, method, url, max_bytes=MAX_BODY_BYTES, allowed_types=None, **kwargs):
+    # raises requests exceptions like session.request(); the body is never read past max_bytes
+    tr = tracing.active()
+    if not tr:
+        return read_bounded(session.request(method, url, stream=True, **kwargs), max_bytes, allowed_types)
+    t0 = time.perf_counter_ns()
+    try:
+        r = session.request(method, url, stream=True, **kwargs)
+    except requests.RequestException as e:
+        tr.record("request", "http", t0, method=method, url=url, error=type(e).__name__)
+        raise
+    t1 = time.perf_counter_ns()
+    tr.record("ttfb", "http", t0, t1, url=url)
+    br = read_bounded(r, max_bytes, allowed_types)
+    tr.record("download", "http", t1, url=url, bytes=len(br.content))
+    tr.record("request", "http", t0, method=method, url=url, status=r.status_code, bytes=len(br.content))
+    return br
+
+def stream_get(session, url, timeout=10, allow_redirects=True, max_bytes=MAX_BODY_BYTES, allowed_types=None, headers=None):
+    try:
+        return stream_request(session, "GET", url, max_bytes, allowed_types, headers=dict(HEADERS, **headers) if headers else HEADERS,
+                              timeout=timeout, allow_redirects=allow_redirects)
+    except requests.RequestException:
+        return None
+
 def probe_head_or_get(session, base_url, path, timeout=10):
     url = urljoin(base_url, path)
+    with tracing.span("probe", "http", url=url):
+        return _probe(session, url, timeout)
+
+def _probe(session, url, timeout):
     try:
         r = session.head(url, headers=HEADERS, timeout=timeout, allow_redirects=True)
         if r.status_code >= 400 or r.status_code == 405:
-            r = session.get(url, headers=HEADERS, timeout=timeout, allow_redirects=True)
+            r = session.get(url, headers=HEADERS, timeout=timeout, allow_redirects=True, stream=True)
+            r.close()
         return url, r
     except requests.RequestException:
         return url, None
@@ -1,19 +1,55 @@
 
-import json, yaml, ssl, re
-from urllib.parse import urljoin
-from ..utils.http import safe_get
-try:
-    import websocket
-except Exception:
-    websocket = None
+import json, ssl, re, time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from ..utils.http import current_archive, stream_get, websocket_client
+from ..utils.openapi import SpecCache, build_index, conditional_headers, content_hash, load_spec
 
 INFO = {"name":"manifest_and_ws","utilities":["recon_mapper"]}
 
-def fetch_manifest_and_openapi(session, base_url, timeout=10):
+MAX_MANIFEST_BYTES = 1024 * 1024
+MAX_SPEC_BYTES = 32 * 1024 * 1024
+
+def ingest_spec(session, url, timeout=10, cache_dir=None):
+    # conditional GET against the cached copy; an unchanged spec (304 or same content hash) is never re-parsed
+    cache = SpecCache(cache_dir) if cache_dir else None
+    entry = cache.get(url) if cache else None
+    out = {"openapi_status": None, "openapi_cache": "off" if cache is None else "miss"}
+    rr = stream_get(session, url, timeout, max_bytes=MAX_SPEC_BYTES, headers=conditional_headers(entry))
+    if rr is None:
+        return out
+    out["openapi_status"] = rr.status_code
+    if entry and rr.status_code == 304:
+        out["openapi_cache"] = "not_modified"
+    elif rr.status_code >= 400:
+        return out
+    else:
+        digest = content_hash(rr.content)
+        if entry and entry.get("content_hash") == digest and not rr.truncated:
+            out["openapi_cache"] = "hash_hit"
+        else:
+            try:
+                data, kind = load_spec(rr.content, rr.headers.get("Content-Type"))
+                entry = {"content_hash": digest, "kind": kind, "truncated": rr.truncated,
+                         "paths_preview": [str(p) for p in data["paths"]][:15] if isinstance(data, dict) and isinstance(data.get("paths"), dict) else [],
+                         "endpoints": build_index(data)}
+            except Exception as e:
+                # a spec we cannot read is a finding, not a reason to abort the run; not cached, so a fixed spec is picked up next time
+                out.update(openapi_kind=None, openapi_paths_preview=[], openapi_endpoints=[], openapi_error=f"{type(e).__name__}: {e}")
+                return out
+    # a 304 may leave out a validator it does not change; a 200 replaces both
+    kept = entry if rr.status_code == 304 else {}
+    entry.update(etag=rr.headers.get("ETag") or kept.get("etag"), last_modified=rr.headers.get("Last-Modified") or kept.get("last_modified"))
+    if cache: entry = cache.put(url, entry)
+    out.update(openapi_kind=entry.get("kind"), openapi_paths_preview=entry.get("paths_preview", []),
+               openapi_endpoints=entry.get("endpoints", []))
+    return out
+
+def fetch_manifest_and_openapi(session, base_url, timeout=10, cache_dir=None):
     out = {"manifest_url": urljoin(base_url,"/.well-known/ai-plugin.json"),
            "manifest_status": None, "openapi_url": None, "openapi_status": None,
-           "openapi_kind": None, "openapi_paths_preview": []}
-    r = safe_get(session, out["manifest_url"], timeout)
+           "openapi_kind": None, "openapi_paths_preview": [], "openapi_endpoints": []}
+    r = stream_get(session, out["manifest_url"], timeout, max_bytes=MAX_MANIFEST_BYTES)
     if not r:
         return out
     out["manifest_status"] = r.status_code
@@ -32,45 +68,88 @@ def fetch_manifest_and_openapi(session, base_url, timeout=10):
         cand = cand or manifest.get("openapi_url") or manifest.get("spec_url")
         if cand:
             out["openapi_url"] = urljoin(base_url, cand)
-            rr = safe_get(session, out["openapi_url"], timeout)
-            if rr:
-                out["openapi_status"] = rr.status_code
-                if rr.status_code < 400:
-                    try:
-                        data = rr.json(); kind = "json"
-                    except Exception:
-                        try:
-                            import yaml
-                            data = yaml.safe_load(rr.text); kind = "yaml"
-                        except Exception:
-                            data, kind = None, None
-                    out["openapi_kind"] = kind
-                    if isinstance(data, dict) and "paths" in data:
-                        out["openapi_paths_preview"] = list(data["paths"].keys())[:15]
+            out.update(ingest_spec(session, out["openapi_url"], timeout, cache_dir))
     return out
 
-def probe_ws(urls, timeout=8, insecure=False):
-    results = []
-    if not websocket: return results
-    for u in urls:
-        status, detail = "skipped", ""
+DEFAULT_PORTS = {"ws": 80, "wss": 443}
+
+def normalize_ws_url(u):
+    p = urlsplit(u.strip())
+    try:
+        port = p.port
+    except ValueError:
+        return u.strip()
+    scheme, host = p.scheme.lower(), (p.hostname or "").lower()
+    netloc = host if port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+    if p.username: netloc = p.netloc.rsplit("@", 1)[0] + "@" + netloc
+    return urlunsplit((scheme, netloc, p.path or "/", p.query, ""))
+
+def _classify(e):
+    emsg = str(e).lower()
+    if "401" in emsg: return "unauthorized"
+    if "403" in emsg: return "forbidden"
+    if "ssl" in emsg or "certificate" in emsg: return "tls_error"
+    if "timed out" in emsg: return "timeout"
+    return "error"
+
+def _probe_one(u, timeout, insecure, subprotocols, deadline):
+    # handshakes are not HTTP exchanges: the archive keeps their outcome instead
+    archive = current_archive()
+    if archive is not None and archive.replaying:
+        return archive.get_value("WS " + u) or {"url": u, "probe": "error", "detail": "not in archive", "latency_ms": None, "subprotocol": None}
+    res = _handshake(u, timeout, insecure, subprotocols, deadline)
+    if archive is not None: archive.put_value("WS " + u, res)
+    return res
+
+def _handshake(u, timeout, insecure, subprotocols, deadline):
+    left = deadline - time.monotonic()
+    if left <= 0:
+        return {"url": u, "probe": "skipped", "detail": "time budget exhausted", "latency_ms": None, "subprotocol": None}
+    detail, proto = "", None
+    t0 = time.monotonic()
+    try:
+        ws = websocket_client().create_connection(u, timeout=min(timeout, left), subprotocols=subprotocols,
+                                         sslopt={"cert_reqs": ssl.CERT_NONE} if insecure else None)
+        latency = time.monotonic() - t0
+        status, proto = "handshake_ok", ws.getsubprotocol()
         try:
-            ws = websocket.create_connection(u, timeout=timeout, sslopt={"cert_reqs": ssl.CERT_NONE} if insecure else None)
-            status = "handshake_ok"; ws.close()
-        except Exception as e:
-            emsg = str(e).lower()
-            if "401" in emsg: status = "unauthorized"
-            elif "403" in emsg: status = "forbidden"
-            elif "ssl" in emsg or "certificate" in emsg: status = "tls_error"
-            elif "timed out" in emsg: status = "timeout"
-            else: status = "error"
-            detail = str(e)[:120]
-        results.append({"url": u, "probe": status, "detail": detail})
+            ws.close(timeout=min(1, max(0, deadline - time.monotonic())))
+        except Exception:
+            pass
+    except Exception as e:
+        latency = time.monotonic() - t0
+        status, detail = _classify(e), str(e)[:120]
+    return {"url": u, "probe": status, "detail": detail, "latency_ms": round(latency * 1000, 1), "subprotocol": proto}
+
+def probe_ws(urls, timeout=8, insecure=False, workers=8, budget=None, subprotocols=None, findings=None):
+    # duplicates (after normalization) are probed once; nothing starts after `budget` seconds, late probes report "timeout"
+    if not websocket_client() and not (current_archive() is not None and current_archive().replaying): return []
+    uniq = list(dict.fromkeys(normalize_ws_url(u) for u in urls if u))
+    deadline = time.monotonic() + (budget if budget else float("inf"))
+    pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(uniq) or 1)))
+    futs = [pool.submit(_probe_one, u, timeout, insecure, subprotocols, deadline) for u in uniq]
+    wait(futs, timeout=(budget + 1) if budget else None)
+    pool.shutdown(wait=False, cancel_futures=True)
+    results = []
+    for u, f in zip(uniq, futs):
+        if f.done() and not f.cancelled():
+            results.append(f.result())
+        else:
+            results.append({"url": u, "probe": "timeout" if f.running() else "skipped", "detail": "time budget exhausted",
+                            "latency_ms": None, "subprotocol": None})
+    if findings:
+        for w in results:
+            findings.add(INFO["name"], w["url"], status=w["probe"], success=w["probe"] == "handshake_ok",
+                         latency_s=w["latency_ms"] / 1000 if w["latency_ms"] is not None else None,
+                         detail={"subprotocol": w["subprotocol"], "detail": w["detail"]})
     return results
 
-def run(session, base_url, ws_urls=None, timeout=10, ws_probe=True, ws_insecure=False):
+def combine(manifest, ws_results):
+    return {"module": INFO["name"], "manifest": manifest, "websockets": ws_results}
+
+def run(session, base_url, ws_urls=None, timeout=10, ws_probe=True, ws_insecure=False, ws_workers=8, ws_budget=None):
     manifest = fetch_manifest_and_openapi(session, base_url, timeout)
     ws_results = []
     if ws_probe and ws_urls:
-        ws_results = probe_ws(ws_urls, timeout=timeout, insecure=ws_insecure)
-    return {"module": INFO["name"], "manifest": manifest, "websockets": ws_results}
+        ws_results = probe_ws(ws_urls, timeout=timeout, insecure=ws_insecure, workers=ws_workers, budget=ws_budget)
+    return combine(manifest, ws_results)
@@ -0,0 +1,93 @@
+
+import re
+from .shared import KEYWORDS, JS_ROUTE_PATTERNS
+
+WS_PATTERN = r'ws[s]?:\/\/[^\s\'"]+'
+
+def _findall_value(m):
+    # same shape re.findall() returns for this pattern
+    if not m.re.groups: return m.group(0)
+    if m.re.groups == 1: return m.group(1) or ""
+    return m.groups(default="")
+
+class Matcher:
+    # keywords are tested against one lower-cased copy per chunk (not one full copy per keyword),
+    # the ws regex only runs on chunks that contain "ws://"/"wss://", and route patterns stay
+    # separate compiled regexes so results match per-pattern re.findall exactly
+    def __init__(self, keywords, route_patterns, ws_pattern=WS_PATTERN, chunk_size=1 << 20, overlap=4096):
+        self.keywords = list(keywords)
+        self._kw = frozenset(k.lower() for k in self.keywords)
+        self._kw_tail = max([len(k) for k in self._kw] or [1]) - 1
+        self.routes = [re.compile(p, re.IGNORECASE) for p in route_patterns]
+        self.ws = re.compile(ws_pattern, re.IGNORECASE)
+        self.chunk_size, self.overlap = chunk_size, overlap
+
+    def _find_keywords(self, low, found):
+        for k in self._kw - found:
+            if k in low: found.add(k)
+        return found
+
+    def _result(self, found, routes, ws):
+        return {"keywords": [k for k in self.keywords if k.lower() in found], "routes": routes, "ws_urls": ws}
+
+    def _keywords(self, text):
+        found, step = set(), self.chunk_size
+        for i in range(0, len(text), step):
+            if not self._kw - found: break
+            self._find_keywords(text[i:i + step + self._kw_tail].lower(), found)
+        return found
+
+    def keywords_in(self, text):
+        found = self._keywords(text)
+        return [k for k in self.keywords if k.lower() in found]
+
+    def scan(self, text):
+        routes = set()
+        for pat in self.routes:
+            routes.update(pat.findall(text))
+        found, has_ws, step = set(), False, self.chunk_size
+        for i in range(0, len(text), step):
+            low = text[i:i + step + self._kw_tail + 5].lower()
+            self._find_keywords(low, found)
+            has_ws = has_ws or "ws://" in low or "wss://" in low
+        ws = set(self.ws.findall(text)) if has_ws else set()
+        return self._result(found, routes, ws)
+
+    def scan_chunks(self, chunks):
+        # matches longer than `overlap` chars may be cut at chunk borders; everything shorter is exact
+        found, routes, ws = set(), set(), set()
+        pats = [(p, routes) for p in self.routes] + [(self.ws, ws)]
+        pos = [0] * len(pats)
+        buf, kw_pos = "", 0
+        chunks = iter(chunks)
+        chunk = next(chunks, None)
+        while chunk is not None:
+            nxt = next(chunks, None)
+            final = nxt is None
+            buf += chunk
+            limit = len(buf) - self.overlap
+            low = buf[min(kw_pos, pos[-1]):].lower()
+            self._find_keywords(low, found)
+            kw_pos = max(kw_pos, len(buf) - self._kw_tail)
+            has_ws = "ws://" in low or "wss://" in low
+            for i, (pat, out) in enumerate(pats):
+                deferred = False
+                if pat is not self.ws or has_ws:
+                    for m in pat.finditer(buf, pos[i]):
+                        if not final and m.end() > limit:
+                            deferred = True
+                            break
+                        out.add(_findall_value(m))
+                        pos[i] = max(m.end(), m.start() + 1)
+                if not deferred:
+                    pos[i] = max(pos[i], limit)
+            cut = max(0, min(pos + [kw_pos]) - 64)
+            buf, kw_pos, pos = buf[cut:], kw_pos - cut, [p - cut for p in pos]
+            chunk = nxt
+        return self._result(found, routes, ws)
+
+def iter_chunks(text, size=1 << 20):
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+MATCHER = Matcher(KEYWORDS, JS_ROUTE_PATTERNS)
@@ -1,56 +1,288 @@
-
-import json, yaml, requests
+import itertools, json, ssl, time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from urllib.parse import urljoin, urlparse
+from ..utils.http import HEADERS, current_archive, new_session, read_bounded, websocket_client
+from ..utils.streaming import iter_events
+from ..utils.findings import response_hash
+from ..utils.yamlcache import load_yaml
 
 INFO = {"name":"mcp_scanner","intents":["tool_abuse","data_exfil"]}
 
-COMMON_ENDPOINTS = ["/mcp","/.well-known/mcp.json","/mcp/server","/mcp/tools","/mcp/resources","/mcp/prompts"]
+MAX_BODY_BYTES = 4 * 1024 * 1024
+MAX_LIST_PAGES = 50
+MAX_WS_MESSAGES = 1000
+RPC_DEADLINE = 60  # wall-clock seconds per JSON-RPC request; keepalives and unrelated events do not extend it
+
+COMMON_ENDPOINTS = ["/mcp","/.well-known/mcp.json","/mcp/server","/mcp/tools","/mcp/resources","/mcp/prompts","/sse"]
+RPC_PATHS = ("/mcp",)
+LISTS = (("tools","tools/list"), ("resources","resources/list"), ("prompts","prompts/list"))
+PROTOCOL_VERSION = "2025-03-26"
+CLIENT_INFO = {"name":"ai-pentest-harness","version":"1.0"}
+ACCEPT = "application/json, text/event-stream"
+
+class RpcError(Exception):
+    pass
+
+def _expired(deadline):
+    return deadline is not None and time.monotonic() > deadline
+
+def _match(messages, msg_id, deadline=None):
+    # first JSON-RPC response for msg_id; notifications and batches from the server are skipped over until the deadline
+    for m in messages:
+        for obj in (m if isinstance(m, list) else [m]):
+            if isinstance(obj, dict) and obj.get("id") == msg_id and ("result" in obj or "error" in obj):
+                return obj
+        if _expired(deadline): break
+    if _expired(deadline):
+        raise RpcError(f"no response to request {msg_id} within the RPC deadline")
+    raise RpcError(f"no response to request {msg_id}")
+
+def _decoded(payloads):
+    for p in payloads:
+        try:
+            yield json.loads(p)
+        except ValueError:
+            continue
+
+class HttpTransport:
+    # streamable HTTP: every message is a POST, the reply is plain JSON or an SSE stream
+    name = "http"
+
+    def __init__(self, session, url, headers, timeout, max_bytes, deadline_s=RPC_DEADLINE):
+        self.session, self.url, self.headers, self.timeout, self.max_bytes = session, url, headers, timeout, max_bytes
+        self.deadline_s, self.session_id = deadline_s, None
+
+    def _post(self, msg):
+        h = dict(self.headers, **{"Accept": ACCEPT, "Content-Type": "application/json"})
+        if self.session_id: h["Mcp-Session-Id"] = self.session_id
+        return self.session.post(self.url, json=msg, headers=h, timeout=self.timeout, stream=True)
+
+    def notify(self, msg):
+        self._post(msg).close()
+
+    def request(self, msg):
+        deadline = time.monotonic() + self.deadline_s
+        r = self._post(msg)
+        try:
+            self.session_id = r.headers.get("Mcp-Session-Id") or self.session_id
+            if r.status_code >= 400:
+                raise RpcError(f"HTTP {r.status_code}")
+            if "text/event-stream" in r.headers.get("Content-Type","").lower():
+                events = iter_events(r, max_bytes=self.max_bytes, expired=lambda: _expired(deadline))
+                return _match(_decoded(events), msg["id"], deadline)
+            return _match([read_bounded(r, self.max_bytes).json()], msg["id"])
+        finally:
+            r.close()
+
+    def close(self):
+        if not self.session_id: return
+        try:
+            self.session.delete(self.url, headers=dict(self.headers, **{"Mcp-Session-Id": self.session_id}), timeout=self.timeout).close()
+        except Exception:
+            pass
+
+class SseTransport:
+    # legacy HTTP+SSE: the GET stream announces a POST endpoint, replies come back on the stream
+    name = "sse"
+
+    def __init__(self, session, url, stream, headers, timeout, max_bytes, deadline_s=RPC_DEADLINE):
+        self.session, self.stream, self.headers, self.timeout = session, stream, headers, timeout
+        self.deadline_s, self.deadline = deadline_s, time.monotonic() + deadline_s
+        # one reader for the whole stream; once a request's deadline passes it stops for good (the stream is stalled)
+        self.events = iter_events(stream, max_bytes=max_bytes, expired=lambda: _expired(self.deadline))
+        try:
+            first = next(self.events, b"").decode("utf-8", errors="replace").strip()
+        except Exception:
+            stream.close()  # e.g. a read timeout on a stream that never announces anything
+            raise
+        if not first.startswith(("/", "http://", "https://", "?")):
+            stream.close()
+            raise RpcError("SSE stream did not announce an endpoint")
+        self.endpoint = urljoin(url, first)
+
+    def notify(self, msg):
+        r = self.session.post(self.endpoint, json=msg, headers=dict(self.headers, **{"Content-Type": "application/json"}), timeout=self.timeout)
+        if r.status_code >= 400:
+            raise RpcError(f"HTTP {r.status_code}")
+
+    def request(self, msg):
+        self.deadline = time.monotonic() + self.deadline_s
+        self.notify(msg)
+        return _match(_decoded(self.events), msg["id"], self.deadline)
 
-def run(plan_path, outdir="out/mcp_scan"):
+    def close(self):
+        self.stream.close()
+
+class WsTransport:
+    name = "ws"
+
+    def __init__(self, url, headers, timeout, insecure=False, deadline_s=RPC_DEADLINE):
+        self.deadline_s, self.deadline = deadline_s, None
+        if current_archive() is not None:
+            raise RpcError("WebSocket transport is not recorded/replayed by the HTTP archive")
+        websocket = websocket_client()
+        if not websocket:
+            raise RpcError("websocket-client not installed")
+        self.ws = websocket.create_connection(url, timeout=timeout, subprotocols=["mcp"],
+                                              header=[f"{k}: {v}" for k, v in headers.items()],
+                                              sslopt={"cert_reqs": ssl.CERT_NONE} if insecure else None)
+
+    def notify(self, msg):
+        self.ws.send(json.dumps(msg))
+
+    def _recv(self):
+        for _ in range(MAX_WS_MESSAGES):
+            if _expired(self.deadline): return
+            yield self.ws.recv()
+
+    def request(self, msg):
+        self.deadline = time.monotonic() + self.deadline_s
+        self.notify(msg)
+        return _match(_decoded(self._recv()), msg["id"], self.deadline)
+
+    def close(self):
+        self.ws.close()
+
+def _summary(key, it):
+    # one small record per listed item; schemas and bodies are not kept
+    if not isinstance(it, dict): return str(it)[:200]
+    if key == "tools":
+        props = (it.get("inputSchema") or {}).get("properties") or {}
+        return {"name": it.get("name"), "description": str(it.get("description") or "")[:200], "params": sorted(props)}
+    if key == "resources":
+        return {"uri": it.get("uri"), "name": it.get("name"), "mimeType": it.get("mimeType")}
+    if key == "prompts":
+        return {"name": it.get("name"), "arguments": [a.get("name") for a in it.get("arguments") or [] if isinstance(a, dict)]}
+    return it
+
+def _call(t, method, params, ids):
+    resp = t.request({"jsonrpc":"2.0","id":next(ids),"method":method,"params":params})
+    if "error" in resp:
+        err = resp["error"] if isinstance(resp["error"], dict) else {"message": resp["error"]}
+        raise RpcError(f"{err.get('code')}: {str(err.get('message'))[:200]}")
+    return resp.get("result") or {}
+
+def list_all(t, method, key, ids, max_pages=MAX_LIST_PAGES):
+    items, cursor, pages = [], None, 0
+    while pages < max_pages:
+        res = _call(t, method, {"cursor": cursor} if cursor else {}, ids)
+        pages += 1
+        items.extend(_summary(key, it) for it in res.get(key) or [])
+        cursor = res.get("nextCursor")
+        if not cursor: break
+    return items, pages
+
+def rpc_probe(t, max_pages=MAX_LIST_PAGES):
+    # initialize, then every list the server advertises, following nextCursor
+    out, ids = {"transport": t.name}, itertools.count(1)
+    try:
+        init = _call(t, "initialize", {"protocolVersion": PROTOCOL_VERSION, "capabilities": {}, "clientInfo": CLIENT_INFO}, ids)
+    except Exception as e:
+        out["error"] = str(e)[:200]
+        return out
+    caps = init.get("capabilities") or {}
+    out.update(protocol=init.get("protocolVersion"), server=init.get("serverInfo"), capabilities=sorted(caps))
+    try:
+        t.notify({"jsonrpc":"2.0","method":"notifications/initialized"})
+    except Exception:
+        pass
+    for key, method in LISTS:
+        if caps and key not in caps: continue
+        try:
+            out[key], out[f"{key}_pages"] = list_all(t, method, key, ids, max_pages)
+        except Exception as e:
+            out.setdefault("errors", {})[key] = str(e)[:200]
+    return out
+
+def _with_transport(name, make, max_pages):
+    try:
+        t = make()
+    except Exception as e:
+        return {"transport": name, "error": str(e)[:200]}
+    try:
+        return rpc_probe(t, max_pages)
+    finally:
+        t.close()
+
+def _plain_lists(hit, data):
+    if isinstance(data, dict):
+        for key in ("tools","resources","prompts"):
+            if key in data:
+                v = data[key]
+                hit[key] = list(v) if isinstance(v, dict) else [_summary(key, it) for it in v] if isinstance(v, list) else "present"
+
+def probe_url(session, url, headers, configured, cfg):
+    # one GET (plain JSON listing or a legacy SSE stream), then JSON-RPC over streamable HTTP where it makes sense
+    timeout, max_bytes, max_pages = cfg["timeout"], cfg["max_bytes"], cfg["max_pages"]
+    hit, rpc = {"url": url, "status": None}, None
+    try:
+        r = session.get(url, headers=headers, timeout=timeout, stream=True)
+        hit.update(status=r.status_code, ctype=r.headers.get("Content-Type",""))
+        if r.status_code < 400 and "text/event-stream" in hit["ctype"].lower():
+            rpc = _with_transport("sse", lambda: SseTransport(session, url, r, headers, timeout, max_bytes, cfg["deadline"]), max_pages)
+        else:
+            body = read_bounded(r, max_bytes)
+            try:
+                _plain_lists(hit, body.json())
+            except Exception:
+                pass
+    except Exception as e:
+        hit["error"] = str(e)[:200]
+    if (rpc is None or "error" in rpc) and (configured or urlparse(url).path.rstrip("/") in RPC_PATHS):
+        http = _with_transport("http", lambda: HttpTransport(session, url, headers, timeout, max_bytes, cfg["deadline"]), max_pages)
+        if rpc is None or "error" not in http: rpc = http
+    if rpc is not None:
+        hit["jsonrpc"] = rpc
+    if configured or (hit["status"] or 1000) < 400 or (rpc and "error" not in rpc):
+        return hit
+    return None
+
+def probe_ws_url(url, headers, cfg):
+    hit = {"url": url, "status": None, "ctype": "websocket"}
+    hit["jsonrpc"] = _with_transport("ws", lambda: WsTransport(url, headers, cfg["timeout"], cfg["insecure"], cfg["deadline"]), cfg["max_pages"])
+    return hit
+
+def _md_list(items):
+    names = [(i.get("name") or i.get("uri")) if isinstance(i, dict) else i for i in items]
+    return ", ".join(str(n) for n in names)
+
+def run(plan_path, outdir="out/mcp_scan", session=None, endpoints=None, findings=None):
     Path(outdir).mkdir(parents=True, exist_ok=True)
-    plan = yaml.safe_load(open(plan_path,"r",encoding="utf-8"))
+    plan = load_yaml(plan_path)
     target = plan.get("target","")
     auth = plan.get("auth",{})
-    headers = {}
+    mcp = plan.get("mcp",{}) or {}
+    headers = dict(HEADERS)
     if auth.get("type")=="header":
         headers[auth.get("header_name","Authorization")] = auth.get("value","")
 
-    session = requests.Session()
-    results = []
+    workers = max(1, int(mcp.get("concurrency", 8)))
+    session = session or new_session(workers)
+    cfg = {"timeout": float(mcp.get("timeout", 12)), "max_bytes": int(mcp.get("max_body_bytes", MAX_BODY_BYTES)),
+           "max_pages": int(mcp.get("max_list_pages", MAX_LIST_PAGES)), "insecure": bool(mcp.get("insecure", False)),
+           "deadline": float(mcp.get("rpc_deadline", RPC_DEADLINE))}
 
-    for url in plan.get("mcp",{}).get("http_endpoints",[]):
-        try:
-            r = session.get(url, headers=headers, timeout=12)
-            ct = r.headers.get("Content-Type","") if r else ""
-            data = None
-            try: data = r.json()
-            except Exception: data = None
-            hit = {"url":url,"status":(r.status_code if r else None),"ctype":ct}
-            if isinstance(data, dict):
-                for key in ("tools","resources","prompts"):
-                    if key in data:
-                        hit[key] = list(data[key])[:10] if isinstance(data[key], (list, dict)) else "present"
-            results.append(hit)
-        except Exception as e:
-            results.append({"url":url,"status":None,"error":str(e)[:200]})
+    urls = {u: True for u in mcp.get("http_endpoints",[]) or []}
+    if target:
+        for p in COMMON_ENDPOINTS:
+            urls.setdefault(target.rstrip("/") + p, False)
+        # MCP-looking operations from the OpenAPI endpoint index (templated paths can't be probed blindly)
+        for e in (endpoints.query(path_contains="mcp") if endpoints else ()):
+            if "{" not in e["path"]:
+                urls.setdefault(target.rstrip("/") + e["path"], False)
+    jobs = [lambda u=u, c=c: probe_url(session, u, headers, c, cfg) for u, c in urls.items()]
+    jobs += [lambda u=u: probe_ws_url(u, headers, cfg) for u in mcp.get("ws",[]) or []]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = [r for r in pool.map(lambda job: job(), jobs) if r is not None]
 
-    for p in COMMON_ENDPOINTS:
-        url = target.rstrip("/") + p
-        try:
-            r = session.get(url, headers=headers, timeout=12)
-            if r.status_code < 400:
-                hit = {"url":url,"status":r.status_code,"ctype":r.headers.get("Content-Type","")}
-                try:
-                    data = r.json()
-                    if isinstance(data, dict):
-                        for key in ("tools","resources","prompts"):
-                            if key in data:
-                                hit[key] = list(data[key])[:10] if isinstance(data[key], (list, dict)) else "present"
-                except Exception:
-                    pass
-                results.append(hit)
-        except Exception:
-            pass
+    if findings:
+        for r in results:
+            rpc = r.get("jsonrpc") or {}
+            lists = [k for k in ("tools","resources","prompts") if k in r or k in rpc]
+            findings.add(INFO["name"], r["url"], status=r.get("status"), success=bool(lists or (rpc and "error" not in rpc)), signals=lists,
+                         response_hash=response_hash(json.dumps(r, sort_keys=True, default=str)),
+                         detail={"transport": rpc.get("transport"), **{k: len(rpc[k]) for k in lists if isinstance(rpc.get(k), list)}})
 
     with open(Path(outdir)/"results.json","w",encoding="utf-8") as f:
         json.dump(results,f,indent=2,ensure_ascii=False)
@@ -59,8 +291,21 @@ def run(plan_path, outdir="out/mcp_scan"):
         md.append(f"- {r.get('url')} — status {r.get('status')} — {r.get('ctype','')}")
         for k in ("tools","resources","prompts"):
             if k in r:
-                md.append(f"  - {k}: {r[k] if isinstance(r[k], list) else 'present'}")
+                md.append(f"  - {k}: {_md_list(r[k]) if isinstance(r[k], list) else 'present'}")
+        rpc = r.get("jsonrpc")
+        if rpc:
+            if "error" in rpc:
+                md.append(f"  - JSON-RPC ({rpc['transport']}): {rpc['error']}")
+                continue
+            server = rpc.get("server") or {}
+            md.append(f"  - JSON-RPC ({rpc['transport']}): {server.get('name','?')} {server.get('version','')} protocol {rpc.get('protocol')}")
+            for k in ("tools","resources","prompts"):
+                if k in rpc:
+                    md.append(f"    - {k} ({len(rpc[k])}, {rpc[f'{k}_pages']} pages): {_md_list(rpc[k])}")
+            for k, e in (rpc.get("errors") or {}).items():
+                md.append(f"    - {k}: {e}")
     with open(Path(outdir)/"results.md","w",encoding="utf-8") as f:
         f.write("\n".join(md))
 
-    return {"module": INFO["name"], "count": len(results), "outdir": outdir}
+    return {"module": INFO["name"], "count": len(results),
+            "tools": sum(len(r.get("jsonrpc",{}).get("tools",[])) for r in results), "outdir": outdir}
@@ -0,0 +1,29 @@
+import os, sys
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb(children=False):
+    if resource is None: return None
+    kb = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KiB elsewhere
+    return round(kb / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def available_mb():
+    # MemAvailable from /proc/meminfo (Linux, Android/Termux); None where there is no such file
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def device_workers(requested, cap=4, per_worker_mb=32):
+    # requested workers, cut down to what this device can carry: 2 per core, `per_worker_mb` of free memory each, at most `cap`
+    n = min(max(1, int(requested)), (os.cpu_count() or 1) * 2, cap)
+    mem = available_mb()
+    if mem is not None: n = min(n, max(1, int(mem // per_worker_mb)))
+    return max(1, n)
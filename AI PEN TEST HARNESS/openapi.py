@@ -0,0 +1,136 @@
+import hashlib, json, os, re
+from pathlib import Path
+
+HTTP_METHODS = ("get","put","post","delete","options","head","patch","trace")
+INDEX_VERSION = 1
+
+def load_spec(content, content_type=None):
+    # -> (data, kind); JSON first (also valid YAML, but much faster to parse as JSON)
+    if "yaml" not in (content_type or "").lower():
+        try:
+            return json.loads(content), "json"
+        except ValueError:
+            pass
+    import yaml  # JSON specs never pay for it
+    try:
+        # libyaml is several times faster on multi-MB specs; pure-Python SafeLoader otherwise
+        return yaml.load(content, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)), "yaml"
+    except yaml.YAMLError:
+        return None, None
+
+def _resolve(spec, obj):
+    # local "#/..." refs only; one level is enough for parameters
+    ref = obj.get("$ref") if isinstance(obj, dict) else None
+    if not isinstance(ref, str) or not ref.startswith("#/"): return obj
+    for part in ref[2:].split("/"):
+        if not isinstance(spec, dict): return obj
+        spec = spec.get(part.replace("~1", "/").replace("~0", "~"))
+    return spec if isinstance(spec, dict) else obj
+
+def _params(spec, *lists):
+    out = {}
+    for plist in lists:
+        for p in plist or []:
+            p = _resolve(spec, p)
+            if isinstance(p, dict) and p.get("name"):
+                out[(p.get("in"), p["name"])] = {"name": p["name"], "in": p.get("in"), "required": bool(p.get("required"))}
+    return list(out.values())
+
+def _schema_ref(schema):
+    if not isinstance(schema, dict): return "inline"
+    items = schema.get("items")
+    ref = schema.get("$ref") or (items.get("$ref") if isinstance(items, dict) else None)
+    return ref if isinstance(ref, str) else "inline"
+
+def _body_refs(spec, op):
+    refs = []
+    body = _resolve(spec, op.get("requestBody") or {})
+    content = body.get("content") if isinstance(body, dict) else None
+    for media in (content.values() if isinstance(content, dict) else ()):
+        refs.append(_schema_ref(media.get("schema") if isinstance(media, dict) else None))
+    params = op.get("parameters")
+    for p in params if isinstance(params, list) else ():
+        p = _resolve(spec, p)
+        if isinstance(p, dict) and p.get("in") == "body":
+            refs.append(_schema_ref(p.get("schema")))
+    return sorted(set(refs))
+
+def _security(reqs):
+    return sorted({name for req in reqs or [] if isinstance(req, dict) for name in req})
+
+def build_index(spec):
+    # one compact record per operation: method, path, parameters, auth schemes, request body schema refs
+    if not isinstance(spec, dict) or not isinstance(spec.get("paths"), dict): return []
+    global_sec = spec.get("security")
+    records = []
+    for path, item in spec["paths"].items():
+        if not isinstance(item, dict): continue
+        for method in HTTP_METHODS:
+            op = item.get(method)
+            if not isinstance(op, dict): continue
+            sec = op.get("security", global_sec)
+            try:
+                records.append({"method": method.upper(), "path": str(path), "operation_id": op.get("operationId"),
+                                "params": _params(spec, item.get("parameters"), op.get("parameters")),
+                                "auth": _security(sec), "auth_required": bool(_security(sec)),
+                                "body_refs": _body_refs(spec, op)})
+            except (AttributeError, TypeError, ValueError):
+                continue  # malformed operation: skip it, keep the rest of the spec
+    return records
+
+class EndpointIndex:
+    def __init__(self, records=()):
+        self.records = list(records)
+        self._patterns = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def query(self, method=None, path_contains=None, auth_required=None, param=None, has_body=None):
+        for r in self.records:
+            if method and r["method"] != method.upper(): continue
+            if path_contains and path_contains.lower() not in r["path"].lower(): continue
+            if auth_required is not None and r["auth_required"] != auth_required: continue
+            if param and not any(p["name"] == param for p in r["params"]): continue
+            if has_body is not None and bool(r["body_refs"]) != has_body: continue
+            yield r
+
+    def match(self, path, method=None):
+        # operations whose templated path ("/docs/{id}") matches a concrete path
+        if self._patterns is None:
+            self._patterns = [(re.compile("^" + re.sub(r"\\\{[^}/]+\\\}", "[^/]+", re.escape(r["path"].rstrip("/") or "/")) + "/?$"), r)
+                              for r in self.records]
+        return [r for rx, r in self._patterns if rx.match(path) and (not method or r["method"] == method.upper())]
+
+class SpecCache:
+    # parsed spec summaries on disk, keyed by URL; revalidated with ETag / Last-Modified and a content hash
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url):
+        return self.root / (hashlib.sha256(url.encode("utf-8")).hexdigest()[:32] + ".json")
+
+    def get(self, url):
+        try:
+            entry = json.loads(self._path(url).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("version") == INDEX_VERSION and entry.get("url") == url else None
+
+    def put(self, url, entry):
+        entry = dict(entry, url=url, version=INDEX_VERSION)
+        path = self._path(url)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entry, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+        return entry
+
+def conditional_headers(entry):
+    h = {}
+    if entry and entry.get("etag"): h["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"): h["If-Modified-Since"] = entry["last_modified"]
+    return h
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
@@ -1,12 +1,17 @@
 
-import json
+import json, time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 from ..utils.eval import xss_like
+from ..utils.findings import response_hash
+from ..utils.memstats import peak_rss_mb
 
 INFO = {"name":"output_safety_analyzer","intents":["app_compromise"]}
 
-def run(samples_path, outdir="out/output_safety"):
-    Path(outdir).mkdir(parents=True, exist_ok=True)
+DEFAULT_LIMIT = 500
+
+def _load_texts(samples_path):
     texts = []
     try:
         data = json.load(open(samples_path,"r",encoding="utf-8"))
@@ -17,17 +22,137 @@ def run(samples_path, outdir="out/output_safety"):
             line=line.strip()
             if not line: continue
             texts.append(line)
+    return texts
+
+def iter_json_array(f, read_size=1 << 20):
+    # yields the elements of a top-level JSON array without loading the whole document
+    dec = json.JSONDecoder()
+    buf, pos, eof = "", 1, False
+    while not buf and not eof:
+        more = f.read(read_size)
+        buf, eof = more.lstrip(), not more
+    if not buf.startswith("["):
+        raise ValueError("not a JSON array")
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        try:
+            if pos >= len(buf): raise ValueError("need more data")
+            obj, end = dec.raw_decode(buf, pos)
+            if not eof:
+                # a chunk ending in "7." or "1e" decodes as a shorter number: only trust it once its "," or "]" is in the buffer
+                nxt = end
+                while nxt < len(buf) and buf[nxt] in " \t\r\n":
+                    nxt += 1
+                if nxt >= len(buf) or buf[nxt] not in ",]": raise ValueError("element may continue")
+        except ValueError:
+            if eof: raise
+            more = f.read(read_size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield obj
+        pos = end
+
+def iter_samples(samples_path):
+    # JSON array -> str(element) per sample; anything else -> one stripped non-empty line per sample
+    f = open(samples_path, "r", encoding="utf-8")
+    with f:
+        head = f.read(4096).lstrip()
+        f.seek(0)
+        if head.startswith("["):
+            for t in iter_json_array(f):
+                yield str(t)
+        else:
+            for line in f:
+                line = line.strip()
+                if line: yield line
+
+def _flag_chunk(texts):
+    return [xss_like(t) for t in texts]
+
+def _chunks(samples, chunk_size):
+    start = 0
+    while True:
+        block = list(islice(samples, chunk_size))
+        if not block: return
+        yield start, block
+        start += len(block)
+
+def _findings(start, block, flags):
+    for i, (t, flag) in enumerate(zip(block, flags)):
+        f = {"idx": start + i, "xss_like": flag, "sample": t[:200]}
+        if flag: f["response_hash"] = response_hash(t)
+        yield f
+
+def _iter_findings(samples, workers, chunk_size):
+    chunks = _chunks(samples, chunk_size)
+    if workers <= 1:
+        for start, block in chunks:
+            yield from _findings(start, block, _flag_chunk(block))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # at most 2 chunks per worker in flight; only flags travel back, results stay in sample order
+        inflight = [(start, block, pool.submit(_flag_chunk, block)) for start, block in islice(chunks, workers * 2)]
+        while inflight:
+            start, block, fut = inflight.pop(0)
+            nxt = next(chunks, None)
+            if nxt is not None:
+                inflight.append((nxt[0], nxt[1], pool.submit(_flag_chunk, nxt[1])))
+            yield from _findings(start, block, fut.result())
+
+def _record(findings, f):
+    # only flagged samples go to the findings store; clean ones are the bulk and carry no signal
+    findings.add(INFO["name"], f["idx"], status="flagged", success=True, signals=["xss_like"],
+                 response_hash=f.get("response_hash"), detail={"sample": f["sample"]})
+
+def run_stream(samples_path, outdir="out/output_safety", limit=DEFAULT_LIMIT, workers=1, chunk_size=1000, findings=None):
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+    t0 = time.time()
+    samples = iter_samples(samples_path)
+    if limit:
+        samples = islice(samples, limit)
+    count, flagged, md_hits = 0, 0, []
+    with open(Path(outdir)/"results.ndjson","w",encoding="utf-8") as out:
+        for f in _iter_findings(samples, workers, chunk_size):
+            out.write(json.dumps(f, ensure_ascii=False) + "\n")
+            count += 1
+            if f["xss_like"]:
+                flagged += 1
+                if f["idx"] < 20: md_hits.append(f)
+                if findings: _record(findings, f)
+    elapsed = max(time.time() - t0, 1e-9)
+    stats = {"samples_per_s": round(count / elapsed, 1), "elapsed_s": round(elapsed, 3),
+             "peak_rss_mb": peak_rss_mb(), "peak_rss_workers_mb": peak_rss_mb(children=True)}
+
+    md = [f"# Output Safety Analyzer", f"- Samples analyzed: {count}" + (f" (limit {limit})" if limit else ""),
+          f"- XSS-like flagged: {flagged}",
+          f"- Throughput: {stats['samples_per_s']} samples/s over {stats['elapsed_s']} s ({workers} worker(s))",
+          f"- Peak RSS: {stats['peak_rss_mb']} MB (workers: {stats['peak_rss_workers_mb']} MB)", ""]
+    for f in md_hits:
+        md.append(f"- idx={f['idx']} XSS-like: {f['sample']}")
+    with open(Path(outdir)/"results.md","w",encoding="utf-8") as f:
+        f.write("\n".join(md))
+
+    return {"module": INFO["name"], "samples": count, "flagged": flagged, "stats": stats, "outdir": outdir}
+
+def run(samples_path, outdir="out/output_safety", limit=DEFAULT_LIMIT, findings=None):
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+    texts = _load_texts(samples_path)
 
-    findings = []
-    for i, t in enumerate(texts[:500]):
+    results = []
+    for i, t in enumerate(texts[:limit] if limit else texts):
         flag = xss_like(t)
-        findings.append({"idx":i,"xss_like":flag,"sample":t[:200]})
+        results.append({"idx":i,"xss_like":flag,"sample":t[:200]})
+        if findings and flag: _record(findings, dict(results[-1], response_hash=response_hash(t)))
 
     with open(Path(outdir)/"results.json","w",encoding="utf-8") as f:
-        json.dump(findings,f,indent=2,ensure_ascii=False)
+        json.dump(results,f,indent=2,ensure_ascii=False)
 
-    md = [f"# Output Safety Analyzer", f"- Samples analyzed: {len(texts)}", f"- XSS-like flagged: {sum(1 for f in findings if f['xss_like'])}", ""]
-    for f in findings[:20]:
+    md = [f"# Output Safety Analyzer", f"- Samples analyzed: {len(texts)}", f"- XSS-like flagged: {sum(1 for f in results if f['xss_like'])}", ""]
+    for f in results[:20]:
         if f["xss_like"]:
             md.append(f"- idx={f['idx']} XSS-like: {f['sample']}")
     with open(Path(outdir)/"results.md","w",encoding="utf-8") as f:
@@ -1,72 +1,211 @@
-
-import json, yaml, time, requests
+import codecs, hashlib, json, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from ..utils.eval import likely_doc_titles_list, looks_like_base64_blob
+from ..utils.http import new_session, stream_request
+from ..utils.eval import likely_doc_titles_list, Base64Scanner
+from ..utils.ratelimit import TokenBucket
+from ..utils.streaming import iter_raw
+from ..utils.findings import response_hash
+from ..utils import tracing
+from ..utils.yamlcache import load_yaml
 
 INFO = {"name":"rag_leak_tester","intents":["data_exfil"]}
 
-def run(plan_path, outdir="out/rag_leak"):
+MAX_LIST_BYTES = 8 * 1024 * 1024
+MAX_DOC_BYTES = 64 * 1024
+MAX_DOCS = 5
+MAX_LIST_PAGES = 50
+SAMPLE_CHARS = 1000
+MD_DOC_LINES = 200
+PAGINATION_TYPES = ("none", "cursor", "offset", "page")
+ID_KEYS = ("id","doc_id","_id","uuid")
+_END = object()
+
+def _walk(data, path):
+    for part in str(path).split("."):
+        if not isinstance(data, dict): return None
+        data = data.get(part)
+    return data
+
+def _items(data, items_path=None):
+    if items_path:
+        data = _walk(data, items_path)
+        return data if isinstance(data, list) else []
+    if isinstance(data, list): return data
+    if isinstance(data, dict):
+        out = []
+        for k in ("documents","docs","items","results"):
+            if k in data and isinstance(data[k], list): out.extend(data[k])
+        return out
+    return []
+
+def _ids(items):
+    for it in items:
+        if isinstance(it, dict):
+            for idk in ID_KEYS:
+                if idk in it: yield it[idk]
+
+def _page_body(base, pg, state, page_size):
+    # pagination.param carries the cursor / offset / page number; size_param the page size
+    body = dict(base)
+    if pg.get("size_param") and page_size:
+        body[pg["size_param"]] = page_size
+    if state is not None:
+        body[pg.get("param", pg.get("type"))] = state
+    return body
+
+def iter_list_pages(session, rag, headers, max_bytes, max_pages, bucket):
+    # yields (status, text, items) per list call until the endpoint runs dry or max_pages; list calls share the fetch rate cap
+    pg = rag.get("pagination") or {}
+    kind = pg.get("type", "none")
+    if kind not in PAGINATION_TYPES:
+        raise ValueError(f"rag.pagination.type must be one of {', '.join(PAGINATION_TYPES)}")
+    page_size = int(pg.get("page_size", 0)) or None
+    state = {"offset": pg.get("start", 0), "page": pg.get("start", 1)}.get(kind)
+    for _ in range(max_pages if kind != "none" else 1):
+        bucket.acquire()
+        try:
+            r = stream_request(session, "POST", rag.get("list_endpoint"), max_bytes, headers=headers,
+                               json=_page_body(rag.get("list_body", {}), pg, state, page_size), timeout=15)
+        except Exception as e:
+            yield None, str(e), []
+            return
+        try:
+            data = r.json()
+        except Exception:
+            data = None
+        items = _items(data, pg.get("items_path"))
+        yield (r.status_code if r else None), (r.text[:10000] if r.content else ""), items
+        if not items: return
+        if kind == "cursor":
+            nxt = _walk(data, pg.get("cursor_field", "next_cursor"))
+            if not nxt or nxt == state: return
+            state = nxt
+        elif kind in ("offset", "page"):
+            if page_size and len(items) < page_size: return
+            state += len(items) if kind == "offset" else 1
+
+def fetch_doc(session, url, headers, body, max_bytes, bucket):
+    # streams one document through the base64 scanner; stops at the byte budget or on the first hit
+    bucket.acquire()
+    try:
+        t0 = tracing.now()
+        r = session.post(url, headers=headers, json=body, timeout=20, stream=True)
+        t1 = tracing.now()
+    except Exception as e:
+        return {"status": None, "base64_like": False, "truncated": False, "bytes": 0, "response_hash": None, "sample": str(e)[:SAMPLE_CHARS]}
+    try:
+        decoder = codecs.getincrementaldecoder(r.encoding or "utf-8")(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    scanner, sample, size, truncated, digest = Base64Scanner(), "", 0, False, hashlib.blake2b(digest_size=16)
+    try:
+        for chunk in iter_raw(r):
+            if size + len(chunk) > max_bytes:
+                chunk, truncated = chunk[:max_bytes - size], True
+            size += len(chunk)
+            digest.update(chunk)
+            text = decoder.decode(chunk)
+            if len(sample) < SAMPLE_CHARS: sample += text[:SAMPLE_CHARS - len(sample)]
+            if scanner.feed(text) or truncated: break
+        else:
+            text = decoder.decode(b"", final=True)
+            sample += text[:SAMPLE_CHARS - len(sample)]
+            scanner.feed(text)
+    except Exception as e:
+        sample = sample or str(e)[:SAMPLE_CHARS]
+    finally:
+        r.close()
+    tr = tracing.active()
+    if tr:
+        tr.record("ttfb", "http", t0, t1, url=url)
+        tr.record("download", "http", t1, url=url, bytes=size)
+        tr.record("request", "http", t0, method="POST", url=url, status=r.status_code, bytes=size)
+    return {"status": r.status_code, "base64_like": scanner.finish(), "truncated": truncated, "bytes": size,
+            "response_hash": digest.hexdigest(), "sample": sample}
+
+def _doc_body(template, did):
+    return json.loads(json.dumps(template).replace("__DOC_ID__", str(did)))
+
+def run(plan_path, outdir="out/rag_leak", session=None, findings=None):
     Path(outdir).mkdir(parents=True, exist_ok=True)
-    plan = yaml.safe_load(open(plan_path,"r",encoding="utf-8"))
+    plan = load_yaml(plan_path)
     rag = plan.get("rag",{})
     auth = plan.get("auth",{})
     headers = {"Content-Type":"application/json"}
     if auth.get("type")=="header":
         headers[auth.get("header_name","Authorization")] = auth.get("value","")
 
-    session = requests.Session()
-    findings = []
+    max_docs = int(rag.get("max_docs", MAX_DOCS))
+    max_doc_bytes = int(rag.get("max_doc_bytes", MAX_DOC_BYTES))
+    workers = max(1, int(rag.get("concurrency", 4)))
+    session = session or new_session(workers)
+    bucket = TokenBucket(float(rag.get("rate_limit_per_min", 0)) / 60.0)
+    template = rag.get("get_body_template", {"id":"__DOC_ID__"})
+    t0 = time.time()
 
-    try:
-        r = session.post(rag.get("list_endpoint"), headers=headers, json=rag.get("list_body", {}), timeout=15)
-        list_ok = r.status_code if r else None
-        list_text = r.text[:10000] if r and r.text else ""
-    except Exception as e:
-        list_ok, list_text = None, str(e)
+    first, pages, seen = None, 0, set()
+    def doc_ids():
+        nonlocal first, pages
+        for status, text, items in iter_list_pages(session, rag, headers, int(rag.get("max_list_bytes", MAX_LIST_BYTES)),
+                                                   int(rag.get("max_list_pages", MAX_LIST_PAGES)), bucket):
+            pages += 1
+            if first is None: first = (status, text)
+            new = 0
+            for did in _ids(items):
+                key = str(did)
+                if key in seen: continue
+                seen.add(key)
+                new += 1
+                yield did
+                if len(seen) >= max_docs: return
+            if not new: return
 
-    list_success = likely_doc_titles_list(list_text)
-    findings.append({"step":"list_documents","status":list_ok,"success":list_success,"sample":list_text[:1000]})
+    def fetch(did):
+        return did, fetch_doc(session, rag.get("get_endpoint"), headers, _doc_body(template, did), max_doc_bytes, bucket)
 
-    doc_ids = []
-    try:
-        data = r.json()
-        if isinstance(data, dict):
-            for k in ("documents","docs","items","results"):
-                if k in data and isinstance(data[k], list):
-                    for it in data[k]:
-                        if isinstance(it, dict):
-                            for idk in ("id","doc_id","_id","uuid"):
-                                if idk in it: doc_ids.append(it[idk])
-        elif isinstance(data, list):
-            for it in data:
-                if isinstance(it, dict):
-                    for idk in ("id","doc_id","_id","uuid"):
-                        if idk in it: doc_ids.append(it[idk])
-    except Exception:
-        pass
-    doc_ids = doc_ids[:5]
-
-    gets = []
-    for did in doc_ids:
-        body = json.loads(json.dumps(rag.get("get_body_template", {"id":"__DOC_ID__"})))
-        body_str = json.dumps(body).replace("__DOC_ID__", str(did))
-        body = json.loads(body_str)
-        try:
-            rr = session.post(rag.get("get_endpoint"), headers=headers, json=body, timeout=20)
-            gt, tx = rr.status_code, rr.text[:10000]
-        except Exception as e:
-            gt, tx = None, str(e)
-        s = looks_like_base64_blob(tx)
-        gets.append({"doc_id":did,"status":gt,"base64_like":s,"sample":tx[:1000]})
-    findings.append({"step":"get_documents","docs":gets})
+    count, flagged, shown = 0, 0, []
+    with open(Path(outdir)/"documents.ndjson","w",encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        # a bounded window of fetches in flight keeps memory flat and the output in list order
+        ids, inflight = doc_ids(), deque()
+        for did in ids:
+            inflight.append(pool.submit(fetch, did))
+            if len(inflight) >= workers * 2: break
+        while inflight:
+            did, doc = inflight.popleft().result()
+            nxt = next(ids, _END)
+            if nxt is not _END:
+                inflight.append(pool.submit(fetch, nxt))
+            out.write(json.dumps({"doc_id": did, **doc}, ensure_ascii=False) + "\n")
+            count += 1
+            flagged += doc["base64_like"]
+            if findings:
+                findings.add(INFO["name"], f"doc:{did}", status=doc["status"], success=doc["base64_like"],
+                             signals=["base64_blob"] if doc["base64_like"] else None, response_hash=doc["response_hash"],
+                             detail={"bytes": doc["bytes"], "truncated": doc["truncated"]})
+            if len(shown) < MD_DOC_LINES:
+                shown.append(f"- {'✅' if doc['base64_like'] else '❌'} doc_id={did} status={doc['status']} base64_like={doc['base64_like']}")
+    if first is None:
+        first = (None, "")
+    elapsed = time.time() - t0
 
+    list_ok, list_text = first
+    list_success = likely_doc_titles_list(list_text)
+    if findings:
+        findings.add(INFO["name"], "list", status=list_ok, success=list_success, signals=["titles_list"] if list_success else None,
+                     response_hash=response_hash(list_text), detail={"pages": pages, "docs": count})
+    results = [{"step":"list_documents","status":list_ok,"success":list_success,"pages":pages,"sample":list_text[:1000]},
+               {"step":"get_documents","count":count,"base64_like":flagged,"results":"documents.ndjson"}]
     with open(Path(outdir)/"results.json","w",encoding="utf-8") as f:
-        json.dump(findings,f,indent=2,ensure_ascii=False)
-    md = [f"# RAG Leak Tester", f"- list endpoint: {rag.get('list_endpoint')} status: {list_ok} success: {list_success}", f"- get endpoint: {rag.get('get_endpoint')} (first {len(doc_ids)} ids)", ""]
-    for g in gets:
-        flag = "✅" if g["base64_like"] else "❌"
-        md.append(f"- {flag} doc_id={g['doc_id']} status={g['status']} base64_like={g['base64_like']}")
+        json.dump(results,f,indent=2,ensure_ascii=False)
+    md = [f"# RAG Leak Tester", f"- list endpoint: {rag.get('list_endpoint')} status: {list_ok} success: {list_success} pages: {pages}",
+          f"- get endpoint: {rag.get('get_endpoint')} ({count} docs, {flagged} base64-like, {count/elapsed if elapsed else 0:.1f} docs/s)",
+          f"- per-doc results: documents.ndjson", ""]
+    md += shown
+    if count > len(shown):
+        md.append(f"- … {count - len(shown)} more in documents.ndjson")
     with open(Path(outdir)/"results.md","w",encoding="utf-8") as f:
         f.write("\n".join(md))
 
-    return {"module": INFO["name"], "doc_ids": doc_ids, "outdir": outdir}
+    return {"module": INFO["name"], "docs": count, "base64_like": flagged, "pages": pages, "outdir": outdir}
@@ -0,0 +1,72 @@
+import threading, time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+RETRY_STATUSES = (429, 503)
+_PACING = True
+
+def set_pacing(enabled):
+    # replaying from an archive: buckets and Retry-After pauses hand out tokens without waiting
+    global _PACING
+    _PACING = bool(enabled)
+
+class TokenBucket:
+    def __init__(self, rate_per_sec, burst=1):
+        self.rate = float(rate_per_sec or 0)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self.not_before = 0.0
+        self.lock = threading.Lock()
+
+    def pause(self, seconds):
+        # server asked us to back off (Retry-After): nobody gets a token before then
+        with self.lock:
+            self.not_before = max(self.not_before, time.monotonic() + seconds)
+
+    def acquire(self):
+        if not _PACING: return 0.0
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.not_before:
+                    wait = self.not_before - now
+                elif self.rate <= 0:
+                    return waited
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                    self.stamp = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+def retry_after_seconds(value, default):
+    if not value: return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return default
+
+class HostLimiter:
+    def __init__(self, per_host):
+        self.per_host = max(1, int(per_host))
+        self._sems = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            sem = self._sems.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        with sem:
+            yield
@@ -1,9 +1,15 @@
 
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
-import re
-from .shared import KEYWORDS, JS_ROUTE_PATTERNS
-from ..utils.http import safe_get, detect_encoding, probe_head_or_get
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from .matcher import MATCHER
+from ..utils.http import stream_get, detect_encoding_tier, count_encoding, encoding_stats, new_encoding_stats, probe_head_or_get
+from ..utils.ratelimit import TokenBucket, HostLimiter
+from .asset_cache import AssetCache
+from ..utils.state import CrawlState, body_hash
+from ..utils.spill import Spill
+from ..utils import tracing
 
 INFO = {"name":"recon_mapper","utilities":["recon_mapper"]}
 
@@ -12,48 +18,205 @@ COMMON_PATHS = [
     "/openapi.json","/swagger","/swagger.json","/docs","/redoc",
     "/graphql","/api","/api/v1","/ws","/socket.io","/mcp","/rag","/embeddings"
 ]
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+MAX_SCRIPT_BYTES = 8 * 1024 * 1024
+EXTRACT_TAGS = ("a", "form", "script")
 
 def same_origin(base_url, other_url):
     bp, op = urlparse(base_url), urlparse(other_url)
     return (bp.scheme, bp.netloc) == (op.scheme, op.netloc)
 
-def run(session, base_url, timeout=10, max_pages=40):
-    pages, scripts, ws_urls, endpoints = [], [], set(), []
-    to_visit, visited = [base_url], set()
-
-    for p in COMMON_PATHS:
-        url, r = probe_head_or_get(session, base_url, p, timeout)
-        endpoints.append({"url":url,"path":p,"status":(r.status_code if r else None),"ctype":(r.headers.get("Content-Type","") if r else "")})
-
-    while to_visit and len(visited) < max_pages:
-        url = to_visit.pop(0)
-        if url in visited: continue
-        visited.add(url)
-        r = safe_get(session, url, timeout)
-        if not r or "text/html" not in r.headers.get("Content-Type",""): continue
-        html = r.content.decode(detect_encoding(r.content), errors="ignore")
-        soup = BeautifulSoup(html, "html.parser")
-
-        for a in soup.find_all("a", href=True):
-            href = urljoin(url, a["href"])
-            if same_origin(base_url, href) and href not in visited and len(visited)+len(to_visit) < max_pages:
-                to_visit.append(href)
-
-        forms = [{"action": urljoin(url, f.get("action") or ""), "method": (f.get("method") or "GET").upper()} for f in soup.find_all("form")]
-        kws = [k for k in KEYWORDS if k.lower() in html.lower()]
-        pages.append({"url": url, "forms": forms, "keywords": kws})
-
-        for s in soup.find_all("script", src=True):
-            s_url = urljoin(url, s["src"])
-            sr = safe_get(session, s_url, timeout)
-            if sr and sr.status_code < 400 and "javascript" in sr.headers.get("Content-Type",""):
-                text = sr.text
-                routes = set()
-                for pat in JS_ROUTE_PATTERNS:
-                    for m in re.findall(pat, text, flags=re.IGNORECASE):
-                        routes.add(m)
-                for m in re.findall(r'ws[s]?:\/\/[^\s\'"]+', text, flags=re.IGNORECASE):
-                    ws_urls.add(m)
-                scripts.append({"url": s_url, "routes": sorted(routes), "keywords": [k for k in KEYWORDS if k.lower() in text.lower()]})
-
-    return {"module": INFO["name"], "pages": pages, "scripts": scripts, "ws_urls": sorted(ws_urls), "endpoints": endpoints}
+class Fetcher:
+    def __init__(self, session, pool, timeout=10, per_host=1, rps=None, max_page_bytes=MAX_PAGE_BYTES, max_script_bytes=MAX_SCRIPT_BYTES, state=None,
+                 parsers=None):
+        self.session, self.pool, self.timeout, self.state, self.parsers = session, pool, timeout, state, parsers
+        self.max_page_bytes, self.max_script_bytes = max_page_bytes, max_script_bytes
+        self.hosts = HostLimiter(per_host)
+        self.bucket = TokenBucket(rps)
+
+    def _limited(self, url, fn):
+        with self.hosts.slot(url):
+            self.bucket.acquire()
+            return fn()
+
+    def submit(self, url, fn):
+        return self.pool.submit(self._limited, url, fn)
+
+    def fetch(self, url):
+        return stream_get(self.session, url, self.timeout, max_bytes=self.max_page_bytes, allowed_types=("text/html",),
+                          headers=self.state.headers(url) if self.state else None)
+
+    def fetch_script(self, url):
+        return stream_get(self.session, url, self.timeout, max_bytes=self.max_script_bytes, allowed_types=("javascript",),
+                          headers=self.state.headers(url) if self.state else None)
+
+    def fetch_page(self, url):
+        # -> (response, extraction future or None); with a parser pool the body is handed off as soon as it arrives,
+        # so pages parse on other cores while the crawler is still consuming earlier ones
+        r = self.fetch(url)
+        if self.parsers is None or not r or r.status_code != 200 or "text/html" not in r.headers.get("Content-Type",""):
+            return r, None
+        return r, self.parsers.submit(extract_html, url, r.content, r.headers.get("Content-Type"))
+
+    def get(self, url):
+        return self.submit(url, lambda: self.fetch_page(url))
+
+    def probe(self, base_url, path):
+        url = urljoin(base_url, path)
+        return self.pool.submit(self._limited, url, lambda: probe_head_or_get(self.session, base_url, path, self.timeout))
+
+def scan_script_text(text):
+    with tracing.span("scan", bytes=len(text)):
+        res = MATCHER.scan(text)
+    return {"routes": sorted(res["routes"]), "keywords": res["keywords"], "ws_urls": sorted(res["ws_urls"])}
+
+def _parse_lxml(url, html):
+    import lxml.html
+    doc = lxml.html.document_fromstring(html)
+    # smart strings keep a reference to their element (and so the whole tree) alive; urljoin can hand them back unchanged
+    return {"links": [urljoin(url, h) for h in doc.xpath("//a/@href", smart_strings=False)],
+            "forms": [{"action": urljoin(url, f.get("action") or ""), "method": (f.get("method") or "GET").upper()} for f in doc.iter("form")],
+            "scripts": [urljoin(url, s) for s in doc.xpath("//script/@src", smart_strings=False)]}
+
+def _parse_soup(url, html):
+    from bs4 import BeautifulSoup, SoupStrainer  # a re-run answered entirely by 304s never loads it
+    # only <a>, <form> and <script> are built into the tree; everything else is skipped by the tokenizer callbacks
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer(EXTRACT_TAGS))
+    return {"links": [urljoin(url, a["href"]) for a in soup.find_all("a", href=True)],
+            "forms": [{"action": urljoin(url, f.get("action") or ""), "method": (f.get("method") or "GET").upper()} for f in soup.find_all("form")],
+            "scripts": [urljoin(url, s["src"]) for s in soup.find_all("script", src=True)]}
+
+def parser_backend():
+    try:
+        import lxml.html  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+_PARSE = {"lxml": _parse_lxml, "html.parser": _parse_soup}
+
+def extract_html(url, content, content_type=None, backend=None):
+    # bytes in, compact extraction record out; picklable both ways so it can run in a worker process.
+    # "charset" carries (tier, seconds) back so the caller's encoding stats stay complete
+    with tracing.span("decode", bytes=len(content)):
+        tier, enc, seconds = detect_encoding_tier(content, content_type)
+        html = content.decode(enc, errors="ignore")
+    backend = backend or parser_backend()
+    with tracing.span("parse", bytes=len(content), backend=backend):
+        try:
+            page = _PARSE[backend](url, html)
+        except Exception:
+            # lxml refuses some inputs (empty documents, encoding declarations in str); the soup path takes anything
+            page = _parse_soup(url, html)
+    with tracing.span("scan", bytes=len(html)):
+        page["keywords"] = MATCHER.keywords_in(html)
+    page["charset"] = (tier, seconds)
+    return page
+
+def extract_page(url, r, enc_stats=None):
+    page = extract_html(url, r.content, r.headers.get("Content-Type"))
+    count_encoding(*page.pop("charset"), into=enc_stats)
+    return page
+
+def _parser_init():
+    # forked workers inherit the parent's tracer; their spans would never reach trace.json
+    tracing.disable()
+
+def _pooled_scan(parsers):
+    return lambda text: parsers.submit(scan_script_text, text).result()
+
+def _add_script(s_url, entry, scripts, ws_urls):
+    if entry:
+        ws_urls.update(entry["ws_urls"])
+        scripts.append({"url": s_url, "routes": entry["routes"], "keywords": entry["keywords"]})
+
+def run(session, base_url, timeout=10, max_pages=40, concurrency=1, per_host=None, rps=None,
+        max_page_bytes=MAX_PAGE_BYTES, max_script_bytes=MAX_SCRIPT_BYTES, state_path=None, findings=None, parse_workers=0,
+        spill_dir=None, prefetch=None):
+    ws_urls, endpoints = set(), []
+    # spill_dir: frontier and visited set in scratch sqlite, pages/scripts streamed to <spill_dir>/*.ndjson as they are found
+    spill = Spill(spill_dir) if spill_dir else None
+    if spill:
+        pages, scripts, to_visit, visited = spill.list("pages"), spill.list("scripts"), spill.deque("frontier"), spill.set("visited")
+        to_visit.append(base_url)
+    else:
+        pages, scripts, to_visit, visited = [], [], deque([base_url]), set()
+    # every queued URL (or the next `prefetch` of them) is fetched ahead of time; results are still consumed in crawl order,
+    # so pages/scripts/endpoints come out exactly as with a serial crawl
+    inflight, pending_scripts = {}, deque()
+    # with a state file, unchanged pages/bundles (304 or same sha256) reuse last run's extraction
+    state = CrawlState(state_path, base_url) if state_path else None
+    # parse_workers > 0: HTML extraction and JS scans run in worker processes instead of the fetch / crawl threads
+    parsers = ProcessPoolExecutor(max_workers=parse_workers, initializer=_parser_init) if parse_workers > 0 else None
+    assets = AssetCache(_pooled_scan(parsers) if parsers else scan_script_text, state)
+    enc_stats = new_encoding_stats()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            fetch = Fetcher(session, pool, timeout, per_host or concurrency, rps, max_page_bytes, max_script_bytes, state, parsers)
+            probes = [(p, fetch.probe(base_url, p)) for p in COMMON_PATHS]
+            inflight[base_url] = fetch.get(base_url)
+
+            def prefetch_next():
+                # bounded read-ahead: only the next `prefetch` queued pages are fetched early, so finished bodies cannot pile up
+                for u in list(islice(to_visit, prefetch * 4)):
+                    if len(inflight) >= prefetch: break
+                    if u not in inflight and u not in visited: inflight[u] = fetch.get(u)
+
+            while to_visit and len(visited) < max_pages:
+                url = to_visit.popleft()
+                if url in visited: continue
+                visited.add(url)
+                fut = inflight.pop(url, None) or fetch.get(url)
+                if prefetch: prefetch_next()
+                r, parsed = fut.result()
+                while pending_scripts and pending_scripts[0][1].done():
+                    s_url, fut, hit = pending_scripts.popleft()
+                    _add_script(s_url, assets.resolve(fut, hit), scripts, ws_urls)
+                page = state.reuse(url, r) if state and r is not None and r.status_code == 304 else None
+                if page is None:
+                    if not r or "text/html" not in r.headers.get("Content-Type",""): continue
+                    digest = body_hash(r.content) if state else None
+                    page = state.reuse(url, r, digest) if state else None
+                    if page is None:
+                        if parsed:
+                            page = parsed.result()
+                            count_encoding(*page.pop("charset"), into=enc_stats)
+                        else:
+                            page = extract_page(url, r, enc_stats)
+                        if state: state.record(url, "page", r, digest, page)
+
+                for href in page["links"]:
+                    if same_origin(base_url, href) and href not in visited and len(visited)+len(to_visit) < max_pages:
+                        to_visit.append(href)
+                        if not prefetch and href not in inflight:
+                            inflight[href] = fetch.get(href)
+
+                pages.append({"url": url, "forms": page["forms"], "keywords": page["keywords"]})
+
+                for s_url in page["scripts"]:
+                    pending_scripts.append((s_url,) + assets.get(s_url, fetch.submit, fetch.fetch_script))
+
+            for s_url, fut, hit in pending_scripts:
+                _add_script(s_url, assets.resolve(fut, hit), scripts, ws_urls)
+            for p, fut in probes:
+                url, r = fut.result()
+                endpoints.append({"url":url,"path":p,"status":(r.status_code if r else None),"ctype":(r.headers.get("Content-Type","") if r else "")})
+                if findings:
+                    findings.add(INFO["name"], url, status=endpoints[-1]["status"], detail={"ctype": endpoints[-1]["ctype"]})
+            for fut in inflight.values():
+                fut.cancel()
+    finally:
+        # also on errors: a long-lived service process must not keep worker processes or scratch files per failed job
+        if parsers:
+            parsers.shutdown(cancel_futures=True)
+        if spill:
+            spill.close()
+
+    out = {"module": INFO["name"], "pages": pages, "scripts": scripts, "ws_urls": sorted(ws_urls), "endpoints": endpoints, "asset_cache": assets.stats,
+           "encoding_stats": encoding_stats(enc_stats), "parser": {"backend": parser_backend(), "workers": parse_workers}}
+    if state:
+        out["changes"] = state.changes()
+        state.commit()
+        state.close()
+    return out
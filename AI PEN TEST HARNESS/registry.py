@@ -0,0 +1,62 @@
+import importlib, json, re, subprocess, sys, threading, time
+
+# third-party packages that must never be paid for at startup
+HEAVY = ("requests", "urllib3", "rich", "bs4", "yaml", "websocket", "chardet")
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+class Registry:
+    # modules keyed by their INFO["name"]; each is imported the first time a phase asks for it
+    def __init__(self, package, modules):
+        self.package = package
+        self.modules = dict(modules)
+        self.import_s = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        mod = self._loaded.get(name)
+        if mod is not None: return mod
+        with self._lock:
+            if name not in self._loaded:
+                t0 = time.perf_counter()
+                mod = importlib.import_module(f"{self.package}.{self.modules[name]}")
+                if mod.INFO["name"] != name:
+                    raise ValueError(f"{self.modules[name]} declares INFO name {mod.INFO['name']!r}, registered as {name!r}")
+                self.import_s[name] = round(time.perf_counter() - t0, 4)
+                self._loaded[name] = mod
+            return self._loaded[name]
+
+    def loaded(self):
+        return list(self._loaded)
+
+def cold_import(module, cwd=None, python=sys.executable):
+    # fresh interpreter with -X importtime: cumulative ms for `module` and the heavy packages it dragged in
+    p = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"], cwd=cwd, capture_output=True, text=True)
+    total, heavy = None, {}
+    for line in p.stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if not m: continue
+        name = m.group(4)
+        if name in HEAVY: heavy[name] = round(int(m.group(2)) / 1000, 1)
+        if name == module: total = round(int(m.group(2)) / 1000, 1)
+    err = None if p.returncode == 0 else (p.stderr.strip().splitlines() or ["import failed"])[-1]
+    return {"module": module, "ms": total, "heavy": heavy, "error": err}
+
+def check_imports(registry, startup="harness", cwd=None, startup_budget_ms=200, budget_ms=1000, as_json=False):
+    # startup must stay free of HEAVY packages and under its budget; each module gets its own cold-import budget
+    rows = [dict(cold_import(startup, cwd), name="(startup)", budget_ms=startup_budget_ms)]
+    rows += [dict(cold_import(f"{registry.package}.{mod}", cwd), name=name, budget_ms=budget_ms)
+             for name, mod in registry.modules.items()]
+    failed = 0
+    for r in rows:
+        over = r["error"] or r["ms"] is None or r["ms"] > r["budget_ms"] or (r["name"] == "(startup)" and r["heavy"])
+        r["ok"] = not over
+        failed += bool(over)
+        if as_json:
+            print(json.dumps(r))
+        else:
+            heavy = ", ".join(f"{k} {v} ms" for k, v in sorted(r["heavy"].items(), key=lambda kv: -kv[1]))
+            print(f"{'ok  ' if r['ok'] else 'OVER'}\t{r['name']:<26}\t{r['ms'] if r['ms'] is not None else '-':>8} ms / {r['budget_ms']} ms"
+                  f"\t{r['error'] or heavy}")
+    print(f"{failed} over budget" if failed else "all imports within budget", file=sys.stderr)
+    return 1 if failed else 0
@@ -1,9 +1,84 @@
-import json
+import gzip, json, os, shutil
 from pathlib import Path
 
-def write_reports(outdir, summary_md, report_obj):
-    Path(outdir).mkdir(parents=True, exist_ok=True)
-    with open(Path(outdir) / "report.json", "w", encoding="utf-8") as f:
-        json.dump(report_obj, f, indent=2, ensure_ascii=False)
-    with open(Path(outdir) / "report.md", "w", encoding="utf-8") as f:
-        f.write(summary_md)
+def _open(path, mode):
+    return gzip.open(path, mode, compresslevel=5) if str(path).endswith(".gz") else open(path, mode)
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def _spilled(obj):
+    return hasattr(obj, "iter_json")
+
+def _write_json(f, obj):
+    # same bytes as _dumps(obj), but spilled lists (utils.spill.SpillList) are copied line by line, never loaded
+    if _spilled(obj):
+        f.write(b"[")
+        for i, line in enumerate(obj.iter_json()):
+            f.write(b"," + line if i else line)
+        f.write(b"]")
+    elif isinstance(obj, dict) and any(_spilled(v) for v in obj.values()):
+        f.write(b"{")
+        for i, (k, v) in enumerate(obj.items()):
+            f.write((b"," if i else b"") + _dumps(str(k)) + b":")
+            _write_json(f, v)
+        f.write(b"}")
+    else:
+        f.write(_dumps(obj))
+
+class ReportWriter:
+    # each section lands in report.d/ (compact JSON, optionally gzipped) the moment it is ready;
+    # assemble() concatenates the shards into report.json/report.md without re-serializing them
+    def __init__(self, outdir, compress=False):
+        self.outdir = Path(outdir)
+        self.shards = self.outdir / "report.d"
+        self.ext = ".json.gz" if compress else ".json"
+        if self.shards.exists(): shutil.rmtree(self.shards)
+        self.shards.mkdir(parents=True)
+
+    def _atomic(self, name, data):
+        path = self.shards / name
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(gzip.compress(data, 5) if name.endswith(".gz") else data)
+        os.replace(tmp, path)
+        return path
+
+    def section(self, key, obj):
+        if not (_spilled(obj) or isinstance(obj, dict) and any(_spilled(v) for v in obj.values())):
+            return self._atomic(key + self.ext, _dumps(obj))
+        path = self.shards / (key + self.ext)
+        tmp = path.with_name(path.name + ".tmp")
+        with (gzip.open(tmp, "wb", compresslevel=5) if self.ext.endswith(".gz") else open(tmp, "wb")) as f:
+            _write_json(f, obj)
+        os.replace(tmp, path)
+        return path
+
+    def markdown(self, key, text):
+        return self._atomic(key + ".md", text.encode("utf-8"))
+
+    def done(self):
+        return sorted(p.name.split(".")[0] for p in self.shards.glob("*" + self.ext))
+
+    def assemble(self, header, order, md_order=("summary",), partial=False):
+        # header: small top-level fields written first; then each finished section in `order`
+        out = self.outdir / ("report" + self.ext)
+        tmp = out.with_name(out.name + ".tmp")
+        with (gzip.open(tmp, "wb", compresslevel=5) if self.ext.endswith(".gz") else open(tmp, "wb")) as f:
+            head = dict(header, partial=True) if partial else header
+            f.write(_dumps(head)[:-1])
+            sep = b"," if head else b""
+            for key in order:
+                shard = self.shards / (key + self.ext)
+                if not shard.exists(): continue
+                f.write(sep + json.dumps(key).encode("utf-8") + b":")
+                with _open(shard, "rb") as src:
+                    shutil.copyfileobj(src, f, 1 << 20)
+                sep = b","
+            f.write(b"}")
+        os.replace(tmp, out)
+        with open(self.outdir / "report.md", "wb") as f:
+            for i, key in enumerate(k for k in md_order if (self.shards / (k + ".md")).exists()):
+                if i: f.write(b"\n")
+                with open(self.shards / (key + ".md"), "rb") as src:
+                    shutil.copyfileobj(src, f, 1 << 20)
+        return out
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+class Task:
+    __slots__ = ("name", "fn", "deps")
+
+    def __init__(self, name, fn, deps=()):
+        self.name, self.fn, self.deps = name, fn, tuple(deps)
+
+def run_dag(tasks, max_workers=4, on_done=None):
+    # each task runs as soon as its deps are done; fn receives {dep_name: dep_result}
+    pending = {t.name: t for t in tasks}
+    for t in pending.values():
+        missing = [d for d in t.deps if d not in pending]
+        if missing:
+            raise ValueError(f"task {t.name!r} depends on unknown task(s): {', '.join(missing)}")
+    results, running = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        while pending or running:
+            for name, t in list(pending.items()):
+                if all(d in results for d in t.deps):
+                    running[pool.submit(t.fn, {d: results[d] for d in t.deps})] = name
+                    del pending[name]
+            if not running:
+                raise ValueError(f"dependency cycle between: {', '.join(sorted(pending))}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                results[name] = fut.result()
+                if on_done:
+                    on_done(name, results[name])
+    return results
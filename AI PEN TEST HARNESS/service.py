@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+import argparse, http.client, json, os, socket, sys, threading, time, uuid
+from collections import Counter, OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import urlparse
+
+# Warm harness process for bot-triggered runs: modules stay imported, plans / payload corpora parsed and connection pools open
+# between jobs. A job is a harness.py argv; it writes the same output directory as the CLI would.
+#   POST /jobs {"argv": [...]}   -> 202 job (429 when the queue is full)
+#   GET  /jobs/<id>/events       -> NDJSON progress, held open until the job ends
+#   GET  /jobs, /jobs/<id>, /health; DELETE /jobs/<id> cancels a queued job
+DEFAULT_SOCKET = "/run/aipentest/harness.sock"  # etc/systemd/system/aipentest-harness.service, scripts/aipentest.sh
+DEFAULT_TCP = "http://127.0.0.1:8787"
+# process-wide switches (tracer, HTTP archive, rate-limit pacing): a job using one runs alone
+EXCLUSIVE_FLAGS = ("trace", "record", "replay")
+KEEP_FINISHED = 200
+MAX_SESSIONS = 32
+FINAL = ("done", "failed", "cancelled")
+UNREACHABLE = 3
+
+class QueueFull(Exception):
+    pass
+
+class _JobParser(argparse.ArgumentParser):
+    # bad job argv is the client's problem, not a reason for the service to exit
+    def error(self, message):
+        raise ValueError(message)
+
+    def exit(self, status=0, message=None):
+        raise ValueError((message or "").strip() or "not a runnable job")
+
+class Job:
+    def __init__(self, argv, args):
+        self.id = uuid.uuid4().hex[:12]
+        self.argv, self.args = argv, args
+        self.target = urlparse(args.url).netloc if args.url else ""
+        self.exclusive = any(getattr(args, f) for f in EXCLUSIVE_FLAGS)
+        self.status, self.error = "queued", None
+        self.created, self.started, self.finished = time.time(), None, None
+        self.events = []
+        self.cond = threading.Condition()
+
+    def emit(self, event, **fields):
+        with self.cond:
+            self.events.append(dict(fields, event=event, job=self.id, t=round(time.time(), 3)))
+            self.cond.notify_all()
+
+    def set_status(self, status, **fields):
+        with self.cond:
+            self.status = status
+            if status == "running": self.started = time.time()
+            if status in FINAL: self.finished = time.time()
+            self.error = fields.get("error", self.error)
+            self.events.append(dict(fields, event=status, job=self.id, t=round(time.time(), 3)))
+            self.cond.notify_all()
+
+    def follow(self, wait=True):
+        # every event so far, then new ones as they arrive until the job is over
+        i = 0
+        while True:
+            with self.cond:
+                while wait and i >= len(self.events) and self.status not in FINAL:
+                    self.cond.wait()
+                batch, i = self.events[i:], len(self.events)
+                over = self.status in FINAL or not wait
+            yield from batch
+            if over: return
+
+    def info(self):
+        return {"id": self.id, "status": self.status, "target": self.args.url, "outdir": self.args.outdir, "argv": self.argv,
+                "exclusive": self.exclusive, "created": self.created, "started": self.started, "finished": self.finished,
+                "error": self.error}
+
+class JobQueue:
+    # bounded; a worker takes the oldest job whose target is under its limit, so one busy target does not hold up the rest
+    def __init__(self, max_pending, per_target):
+        self.max_pending, self.per_target = max_pending, max(1, per_target)
+        self.cond = threading.Condition()
+        self.pending = deque()
+        self.running = Counter()
+        self.active, self.exclusive = 0, False
+
+    def put(self, job):
+        with self.cond:
+            if len(self.pending) >= self.max_pending:
+                raise QueueFull(f"{len(self.pending)} jobs queued")
+            self.pending.append(job)
+            job.emit("queued", position=len(self.pending), target=job.args.url, outdir=job.args.outdir)
+            self.cond.notify_all()
+
+    def _next(self):
+        if self.exclusive: return None
+        for job in self.pending:
+            if job.exclusive:
+                # nothing overtakes a waiting exclusive job, or it could starve
+                return job if self.active == 0 else None
+            if self.running[job.target] < self.per_target:
+                return job
+        return None
+
+    def take(self):
+        with self.cond:
+            while True:
+                job = self._next()
+                if job is not None:
+                    self.pending.remove(job)
+                    self.running[job.target] += 1
+                    self.active += 1
+                    self.exclusive = job.exclusive
+                    return job
+                self.cond.wait()
+
+    def done(self, job):
+        with self.cond:
+            self.running[job.target] -= 1
+            self.active -= 1
+            self.exclusive = False
+            self.cond.notify_all()
+
+    def cancel(self, job):
+        with self.cond:
+            if job not in self.pending: return False
+            self.pending.remove(job)
+            return True
+
+    def snapshot(self):
+        with self.cond:
+            return {"pending": len(self.pending), "running": self.active, "max_pending": self.max_pending, "per_target": self.per_target}
+
+class Service:
+    def __init__(self, workers=2, max_pending=16, per_target=1, outdir="out_service"):
+        import harness  # the import graph stays loaded for every job after this
+        self.harness = harness
+        self.outdir = Path(outdir)
+        self.root, self.base = self.outdir.resolve(), Path.cwd().resolve()
+        self.queue = JobQueue(max_pending, per_target)
+        self.jobs = OrderedDict()
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.started = time.time()
+        self.warm = {}
+        for _ in range(max(1, workers)):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    def warm_up(self):
+        t0 = time.perf_counter()
+        for name in self.harness.MODULES.modules:
+            self.harness.MODULES[name]
+        from utils.yamlcache import load_yaml
+        if Path(self.harness.PROMPT_PAYLOADS).exists():
+            load_yaml(self.harness.PROMPT_PAYLOADS)
+        self.harness.console.width  # first touch imports rich
+        self.warm = {"seconds": round(time.perf_counter() - t0, 3), "modules": dict(self.harness.MODULES.import_s)}
+        return self.warm
+
+    def submit(self, argv):
+        if not isinstance(argv, list) or not all(isinstance(a, str) for a in argv):
+            raise ValueError("argv must be a list of strings")
+        args = self.harness.parse_run_args(self.harness.build_parser(_JobParser), argv, confine=self._confine)
+        job = Job(argv, args)
+        if not any(a == "--outdir" or a.startswith("--outdir=") for a in argv):
+            # concurrent jobs must not share the CLI default "out"
+            args.outdir = str(self.outdir / job.id)
+        self.queue.put(job)
+        with self.lock:
+            self.jobs[job.id] = job
+            finished = [k for k, j in self.jobs.items() if j.status in FINAL]
+            for k in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+                del self.jobs[k]
+        self._count("submitted")
+        return job
+
+    def _confine(self, args):
+        # any local process can submit (TCP has no auth): outputs only under the jobs root, inputs there or in the harness dir
+        for dest in self.harness.OUTPUT_PATHS + self.harness.INPUT_PATHS:
+            value = getattr(args, dest)
+            if not value: continue
+            inputs = dest in self.harness.INPUT_PATHS
+            p = Path(value)
+            p = (p if p.is_absolute() else (self.base if inputs else self.root) / p).resolve()
+            if not (p.is_relative_to(self.root) or inputs and p.is_relative_to(self.base)):
+                where = f"{self.root} or {self.base}" if inputs else str(self.root)
+                raise ValueError(f"--{dest.replace('_', '-')} must be inside {where}")
+            setattr(args, dest, str(p))
+
+    def _count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def cancel(self, job):
+        if not self.queue.cancel(job): return False
+        job.set_status("cancelled")
+        self._count("cancelled")
+        return True
+
+    def _session(self, job):
+        # a job takes its target's idle pooled session for itself; a second concurrent job on that target gets a fresh one
+        from utils.http import new_session
+        with self.lock:
+            session = self.sessions.pop(job.target, None)
+        session = session or new_session(max(16, job.args.concurrency))
+        session.cookies.clear()  # cookies never carry over between jobs
+        return session
+
+    def _release(self, job, session):
+        # one idle session per target is kept for the next job, MAX_SESSIONS in all
+        with self.lock:
+            spare = self.sessions.pop(job.target, None)
+            self.sessions[job.target] = session
+            while len(self.sessions) > MAX_SESSIONS:
+                self.sessions.popitem(last=False)[1].close()
+        if spare: spare.close()
+
+    def _worker(self):
+        while True:
+            job = self.queue.take()
+            try:
+                self._run(job)
+            finally:
+                self.queue.done(job)
+
+    def _run(self, job):
+        job.set_status("running", queued_ms=round((time.time() - job.created) * 1000, 1))
+        kwargs = self.harness.run_kwargs(job.args)
+        session = self._session(job) if job.target else None
+        try:
+            agg = self.harness.run_harness(**kwargs, session=session, progress=lambda e: job.emit(e.pop("event"), **e))
+        except Exception as e:
+            job.set_status("failed", error=f"{type(e).__name__}: {e}")
+            self._count("failed")
+            return
+        finally:
+            if session is not None: self._release(job, session)
+        ext = ".json.gz" if job.args.report_gzip else ".json"
+        job.set_status("done", seconds=round(time.time() - job.started, 3), outdir=job.args.outdir,
+                       report=str(Path(job.args.outdir) / ("report" + ext)),
+                       sections=[k for k in self.harness.REPORT_SECTIONS if k in agg])
+        self._count("done")
+
+    def health(self):
+        from utils.yamlcache import cache_info
+        with self.lock:
+            sessions, counts = list(self.sessions), dict(self.counts)
+        return {"status": "ok", "pid": os.getpid(), "uptime_s": round(time.time() - self.started, 1), "warm": self.warm,
+                "queue": self.queue.snapshot(), "jobs": counts, "sessions": sessions, "yaml_cache": cache_info()}
+
+def make_handler(svc):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *a):
+            pass
+
+        def send(self, code, obj, headers=None):
+            body = json.dumps(obj).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def job(self, job_id):
+            with svc.lock:
+                return svc.jobs.get(job_id)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [p for p in url.path.split("/") if p]
+            if parts == ["health"]: return self.send(200, svc.health())
+            if parts == ["jobs"]:
+                with svc.lock:
+                    jobs = list(svc.jobs.values())
+                return self.send(200, [j.info() for j in jobs])
+            job = self.job(parts[1]) if len(parts) >= 2 and parts[0] == "jobs" else None
+            if job is None: return self.send(404, {"error": "not found"})
+            if len(parts) == 2: return self.send(200, job.info())
+            if parts[2:] != ["events"]: return self.send(404, {"error": "not found"})
+            # close-delimited NDJSON (HTTP/1.0): one line per event, flushed as it happens
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            try:
+                for ev in job.follow(wait="follow=0" not in (url.query or "")):
+                    self.wfile.write(json.dumps(ev).encode() + b"\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_POST(self):
+            if urlparse(self.path).path.rstrip("/") != "/jobs": return self.send(404, {"error": "not found"})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                job = svc.submit(body.get("argv") if isinstance(body, dict) else None)
+            except QueueFull as e:
+                return self.send(429, {"error": f"queue full: {e}"}, {"Retry-After": "5"})
+            except ValueError as e:
+                return self.send(400, {"error": str(e)})
+            self.send(202, job.info(), {"Location": f"/jobs/{job.id}"})
+
+        def do_DELETE(self):
+            parts = [p for p in urlparse(self.path).path.split("/") if p]
+            job = self.job(parts[1]) if len(parts) == 2 and parts[0] == "jobs" else None
+            if job is None: return self.send(404, {"error": "not found"})
+            if not svc.cancel(job): return self.send(409, {"error": f"job is {job.status}"})
+            self.send(200, job.info())
+
+    return Handler
+
+class _TcpServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+class _UnixServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+def serve(args):
+    svc = Service(args.workers, args.max_queue, args.per_target, args.outdir)
+    warm = svc.warm_up()
+    if args.socket:
+        if os.path.exists(args.socket): os.unlink(args.socket)
+        srv = _UnixServer(args.socket, make_handler(svc))
+        os.chmod(args.socket, int(args.socket_mode, 8))
+        where = f"unix:{args.socket}"
+    else:
+        srv = _TcpServer((args.host, args.port), make_handler(svc))
+        where = f"http://{args.host}:{srv.server_port}"
+    print(f"harness service on {where}  (warm in {warm['seconds']} s, {args.workers} workers, queue {args.max_queue}, "
+          f"{args.per_target} per target)", file=sys.stderr, flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        if args.socket and os.path.exists(args.socket): os.unlink(args.socket)
+    return 0
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+def _request(service, method, path, body=None, timeout=10):
+    if service.startswith("unix:"):
+        conn = _UnixConnection(service[5:], timeout=timeout)
+    else:
+        u = urlparse(service)
+        conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=timeout)
+    conn.request(method, path, body=json.dumps(body).encode() if body is not None else None,
+                 headers={"Content-Type": "application/json"} if body is not None else {})
+    return conn.getresponse()
+
+def _line(ev):
+    extra = {k: v for k, v in ev.items() if k not in ("event", "job", "t")}
+    return f"{time.strftime('%H:%M:%S', time.localtime(ev['t']))} {ev['event']:<12} " + " ".join(f"{k}={v}" for k, v in extra.items())
+
+def submit(args):
+    # exit codes: 0 done, 1 failed/cancelled, 2 rejected, 3 service unreachable (callers fall back to a cold harness.py run)
+    argv = args.argv[1:] if args.argv[:1] == ["--"] else args.argv
+    try:
+        r = _request(args.service, "POST", "/jobs", {"argv": argv})
+        job = json.loads(r.read() or b"{}")
+    except OSError as e:
+        print(f"service unreachable at {args.service}: {e}", file=sys.stderr)
+        return UNREACHABLE
+    if r.status != 202:
+        print(f"rejected ({r.status}): {job.get('error')}", file=sys.stderr)
+        return 2
+    print(f"job {job['id']} -> {job['outdir']}", file=sys.stderr)
+    if args.no_follow:
+        print(json.dumps(job))
+        return 0
+    status = None
+    r = _request(args.service, "GET", f"/jobs/{job['id']}/events", timeout=None)
+    for raw in r:
+        ev = json.loads(raw)
+        print(json.dumps(ev) if args.json else _line(ev), flush=True)
+        if ev["event"] in FINAL: status = ev["event"]
+    return 0 if status == "done" else 1
+
+def status(args):
+    try:
+        r = _request(args.service, "GET", f"/jobs/{args.job}" if args.job else "/health")
+    except OSError as e:
+        print(f"service unreachable at {args.service}: {e}", file=sys.stderr)
+        return UNREACHABLE
+    print(json.dumps(json.loads(r.read()), indent=2))
+    return 0 if r.status == 200 else 1
+
+def default_service():
+    if os.environ.get("AIPT_SERVICE"): return os.environ["AIPT_SERVICE"]
+    return f"unix:{DEFAULT_SOCKET}" if os.path.exists(DEFAULT_SOCKET) else DEFAULT_TCP
+
+def main():
+    ap = argparse.ArgumentParser(description="Warm AI Pentest Harness service and its client")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sp = sub.add_parser("serve", help="Run the service (foreground)")
+    sp.add_argument("--host", default="127.0.0.1")
+    sp.add_argument("--port", type=int, default=8787)
+    sp.add_argument("--socket", default=None, help=f"Listen on this Unix socket instead of TCP (deployed: {DEFAULT_SOCKET})")
+    sp.add_argument("--socket-mode", default="660", help="Socket permissions (octal); 660 lets the service's group submit")
+    sp.add_argument("--workers", type=int, default=2, help="Jobs running at once")
+    sp.add_argument("--max-queue", type=int, default=16, help="Jobs waiting at most; more are refused with 429")
+    sp.add_argument("--per-target", type=int, default=1, help="Jobs running at once against the same host")
+    sp.add_argument("--outdir", default="out_service", help="Parent of job output dirs when a job has no --outdir")
+    for name, help_text in (("submit", "Queue a run (harness.py arguments after --) and stream its progress"),
+                            ("status", "Service health, or one job")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--service", default=default_service(), help="http://host:port or unix:/path (default: $AIPT_SERVICE, else "
+                       f"{DEFAULT_SOCKET} when it exists, else {DEFAULT_TCP})")
+    sub.choices["submit"].add_argument("--no-follow", action="store_true", help="Print the queued job and return")
+    sub.choices["submit"].add_argument("--json", action="store_true", help="Events as NDJSON")
+    sub.choices["submit"].add_argument("argv", nargs=argparse.REMAINDER)
+    sub.choices["status"].add_argument("job", nargs="?")
+    args = ap.parse_args()
+    return {"serve": serve, "submit": submit, "status": status}[args.cmd](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
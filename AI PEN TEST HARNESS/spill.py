@@ -0,0 +1,106 @@
+import json, os, sqlite3
+
+# Disk-backed stand-ins for the crawl's deque / set / result lists (--profile low-mem): same operations, memory stays flat.
+_DUMP = {"ensure_ascii": False, "separators": (",", ":"), "default": str}
+
+def _connect(path):
+    db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    # scratch data: no journal, no fsync, small page cache
+    db.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF; PRAGMA cache_size=-1024; PRAGMA temp_store=FILE;")
+    return db
+
+class DiskDeque:
+    # FIFO with duplicates allowed, like collections.deque used as a crawl frontier
+    def __init__(self, db, name):
+        self.db, self.table = db, name
+        db.execute(f"CREATE TABLE IF NOT EXISTS {name} (seq INTEGER PRIMARY KEY AUTOINCREMENT, v TEXT)")
+        self.n = db.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+
+    def append(self, v):
+        self.db.execute(f"INSERT INTO {self.table} (v) VALUES (?)", (v,))
+        self.n += 1
+
+    def popleft(self):
+        row = self.db.execute(f"SELECT seq, v FROM {self.table} ORDER BY seq LIMIT 1").fetchone()
+        if row is None: raise IndexError("pop from an empty deque")
+        self.db.execute(f"DELETE FROM {self.table} WHERE seq = ?", (row[0],))
+        self.n -= 1
+        return row[1]
+
+    def __iter__(self):
+        return (v for (v,) in self.db.execute(f"SELECT v FROM {self.table} ORDER BY seq"))
+
+    def __len__(self):
+        return self.n
+
+class DiskSet:
+    def __init__(self, db, name):
+        self.db, self.table = db, name
+        db.execute(f"CREATE TABLE IF NOT EXISTS {name} (v TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.n = db.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+
+    def add(self, v):
+        self.n += self.db.execute(f"INSERT OR IGNORE INTO {self.table} (v) VALUES (?)", (v,)).rowcount
+
+    def __contains__(self, v):
+        return self.db.execute(f"SELECT 1 FROM {self.table} WHERE v = ?", (v,)).fetchone() is not None
+
+    def __len__(self):
+        return self.n
+
+class SpillList:
+    # append-only list of JSON records kept as NDJSON on disk; len() is free, iteration re-reads the file.
+    # report.ReportWriter copies iter_json() lines straight into the report instead of loading the records
+    def __init__(self, path):
+        self.path = str(path)
+        self.f = open(self.path, "wb")
+        self.n = 0
+
+    def append(self, record):
+        self.f.write(json.dumps(record, **_DUMP).encode("utf-8") + b"\n")
+        self.n += 1
+
+    def close(self):
+        if not self.f.closed: self.f.close()
+
+    def iter_json(self):
+        if not self.f.closed: self.f.flush()
+        with open(self.path, "rb") as f:
+            for line in f:
+                yield line.rstrip(b"\n")
+
+    def __iter__(self):
+        return (json.loads(line) for line in self.iter_json())
+
+    def __len__(self):
+        return self.n
+
+    def __bool__(self):
+        return self.n > 0
+
+class Spill:
+    # one directory per run: scratch sqlite for frontier / visited sets, NDJSON files for result lists
+    def __init__(self, directory):
+        self.dir = str(directory)
+        os.makedirs(self.dir, exist_ok=True)
+        self.scratch = os.path.join(self.dir, "scratch.sqlite")
+        if os.path.exists(self.scratch): os.remove(self.scratch)
+        self.db = _connect(self.scratch)
+        self.lists = []
+
+    def deque(self, name):
+        return DiskDeque(self.db, name)
+
+    def set(self, name):
+        return DiskSet(self.db, name)
+
+    def list(self, name):
+        self.lists.append(SpillList(os.path.join(self.dir, name + ".ndjson")))
+        return self.lists[-1]
+
+    def close(self):
+        # result lists stay on disk (they are outputs); the scratch database goes
+        for lst in self.lists:
+            lst.close()
+        self.db.close()
+        os.remove(self.scratch)
@@ -0,0 +1,104 @@
+import hashlib, json, sqlite3, threading, time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    target TEXT NOT NULL, url TEXT NOT NULL, kind TEXT NOT NULL,
+    etag TEXT, last_modified TEXT, content_hash TEXT, extract TEXT,
+    first_seen REAL, last_seen REAL, last_changed REAL,
+    PRIMARY KEY (target, url)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, target TEXT NOT NULL, started REAL, finished REAL, stats TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_target ON runs (target, started);
+"""
+
+def body_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+class CrawlState:
+    # previous run is loaded up front (lookups from worker threads never touch sqlite); commit() writes this run
+    def __init__(self, path, target):
+        self.path, self.target = path, target
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        rows = self.db.execute("SELECT url, kind, etag, last_modified, content_hash, extract, first_seen, last_seen FROM resources WHERE target = ?",
+                               (target,))
+        self.prev = {url: {"kind": kind, "etag": etag, "last_modified": lm, "content_hash": h, "extract": json.loads(ex) if ex else None,
+                           "first_seen": fs, "last_seen": ls}
+                     for url, kind, etag, lm, h, ex, fs, ls in rows}
+        last = self.db.execute("SELECT started FROM runs WHERE target = ? ORDER BY started DESC LIMIT 1", (target,)).fetchone()
+        self.last_run = last[0] if last else None
+        # every stored row still serves conditional requests / reuse; changes() compares with what the last run saw
+        self.last_seen = {u: v for u, v in self.prev.items() if self.last_run is not None and (v["last_seen"] or 0) >= self.last_run}
+        self.seen = {}
+        self.stats = {"not_modified": 0, "hash_unchanged": 0, "refetched": 0, "new": 0}
+
+    def get(self, url):
+        return self.prev.get(url)
+
+    def headers(self, url):
+        prev = self.prev.get(url)
+        h = {}
+        if prev and prev["extract"] is not None:
+            if prev["etag"]: h["If-None-Match"] = prev["etag"]
+            if prev["last_modified"]: h["If-Modified-Since"] = prev["last_modified"]
+        return h
+
+    def reuse(self, url, r, digest=None):
+        # stored extraction if the server said 304 or the body hashes the same, else None
+        prev = self.prev.get(url)
+        if not prev or prev["extract"] is None: return None
+        if r is not None and r.status_code == 304:
+            self.record(url, prev["kind"], r, prev["content_hash"], prev["extract"], "not_modified")
+            return prev["extract"]
+        if digest and digest == prev["content_hash"]:
+            self.record(url, prev["kind"], r, digest, prev["extract"], "hash_unchanged")
+            return prev["extract"]
+        return None
+
+    def record(self, url, kind, r, digest, extract, how=None):
+        prev = self.prev.get(url)
+        how = how or ("refetched" if prev else "new")
+        etag = r.headers.get("ETag") if r is not None else None
+        lm = r.headers.get("Last-Modified") if r is not None else None
+        with self.lock:
+            self.stats[how] += 1
+            self.seen[url] = {"kind": kind, "etag": etag or (prev or {}).get("etag"), "last_modified": lm or (prev or {}).get("last_modified"),
+                              "content_hash": digest, "extract": extract,
+                              "changed": prev is None or (how == "refetched" and digest != prev["content_hash"])}
+
+    def changes(self, diff_keys=("routes", "ws_urls")):
+        # what differs from the previous run for this target: URLs plus the union of extracted values per key
+        if self.last_run is None:
+            return {"first_run": True, "stats": dict(self.stats)}
+        last = self.last_seen
+        out = {"first_run": False, "last_run": self.last_run, "stats": dict(self.stats),
+               "new": sorted(u for u in self.seen if u not in last),
+               "changed": sorted(u for u, v in self.seen.items() if v["changed"] and u in last),
+               "not_seen": sorted(u for u in last if u not in self.seen)}
+        for key in diff_keys:
+            before = {x for v in last.values() if v["extract"] for x in v["extract"].get(key, [])}
+            after = {x for v in self.seen.values() if v["extract"] for x in v["extract"].get(key, [])}
+            out[f"{key}_added"], out[f"{key}_removed"] = sorted(after - before), sorted(before - after)
+        return out
+
+    def commit(self):
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executemany(
+                """INSERT INTO resources (target, url, kind, etag, last_modified, content_hash, extract, first_seen, last_seen, last_changed)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (target, url) DO UPDATE SET kind = excluded.kind, etag = excluded.etag,
+                       last_modified = excluded.last_modified, content_hash = excluded.content_hash, extract = excluded.extract,
+                       last_seen = excluded.last_seen,
+                       last_changed = CASE WHEN resources.content_hash IS excluded.content_hash THEN resources.last_changed ELSE excluded.last_changed END""",
+                [(self.target, url, v["kind"], v["etag"], v["last_modified"], v["content_hash"],
+                  json.dumps(v["extract"], separators=(",", ":")), now, now, now) for url, v in self.seen.items()])
+            self.db.execute("INSERT INTO runs (target, started, finished, stats) VALUES (?, ?, ?, ?)",
+                            (self.target, self.started, now, json.dumps(self.stats)))
+
+    def close(self):
+        self.db.close()
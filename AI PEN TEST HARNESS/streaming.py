@@ -0,0 +1,105 @@
+import json, time
+
+STREAM_MODES = ("sse", "ndjson", "none")
+DELTA_PATHS = ("choices.0.delta.content", "choices.0.text", "choices.0.message.content",
+               "delta.text", "message.content", "response", "content", "text", "token")
+
+def _walk(obj, path):
+    for part in path.split("."):
+        if isinstance(obj, list):
+            try:
+                obj = obj[int(part)]
+            except (ValueError, IndexError):
+                return None
+        elif isinstance(obj, dict):
+            obj = obj.get(part)
+        else:
+            return None
+    return obj
+
+def extract_delta(obj, path=None):
+    # OpenAI / Anthropic / Ollama-style chunk shapes, or an explicit dotted path ("choices.0.delta.content")
+    if isinstance(obj, str): return obj
+    for p in ([path] if path else DELTA_PATHS):
+        v = _walk(obj, p)
+        if isinstance(v, str): return v
+    return ""
+
+def iter_raw(r, chunk_size=8192):
+    # hand out bytes as soon as they arrive instead of waiting for a full chunk_size read
+    read1 = getattr(r.raw, "read1", None)
+    if read1 is None:
+        yield from r.iter_content(chunk_size=None)
+        return
+    while True:
+        chunk = read1(chunk_size, decode_content=True)
+        if not chunk: break
+        yield chunk
+
+def _payloads(lines, mode, pending):
+    # pending carries SSE data: lines of an event that is split across network chunks
+    for line in lines:
+        line = line.rstrip(b"\r")
+        if mode == "ndjson":
+            if line.strip(): yield line
+        elif not line:
+            if pending: yield b"\n".join(pending)
+            pending.clear()
+        elif line.startswith(b"data:"):
+            pending.append(line[5:][1:] if line[5:6] == b" " else line[5:])
+
+def iter_events(r, mode="sse", max_bytes=None, expired=None):
+    # raw SSE data payloads / NDJSON lines as they arrive; the caller owns (and closes) r.
+    # expired() is checked on every network chunk, so keepalives cannot hold the reader past a caller's deadline
+    pending, buf, size = [], b"", 0
+    for chunk in iter_raw(r):
+        size += len(chunk)
+        if max_bytes and size > max_bytes: return
+        if expired and expired(): return
+        *lines, buf = (buf + chunk).split(b"\n")
+        yield from _payloads(lines, mode, pending)
+    yield from _payloads([buf, b""], mode, pending)
+
+def _delta(payload, delta_path):
+    if payload.strip() == b"[DONE]": return None
+    try:
+        return extract_delta(json.loads(payload), delta_path)
+    except ValueError:
+        return payload.decode("utf-8", errors="replace")
+
+def read_stream(r, mode, t0, max_bytes, stop=None, delta_path=None, check_every=256):
+    # reads an SSE / NDJSON body incrementally; stop(text) is re-checked every `check_every` new chars
+    out = {"text": "", "truncated": False, "stopped": False, "ttfb_s": None, "ttft_s": None}
+    parts, pending, size, text_len, checked, buf = [], [], 0, 0, 0, b""
+    try:
+        for chunk in iter_raw(r):
+            if out["ttfb_s"] is None:
+                out["ttfb_s"] = round(time.time() - t0, 3)
+            size += len(chunk)
+            if size > max_bytes:
+                chunk, out["truncated"] = chunk[:len(chunk) - (size - max_bytes)], True
+            *lines, buf = (buf + chunk).split(b"\n")
+            for payload in _payloads(lines, mode, pending):
+                delta = _delta(payload, delta_path)
+                if delta is None:
+                    out["text"] = "".join(parts)
+                    return out
+                if delta:
+                    if out["ttft_s"] is None:
+                        out["ttft_s"] = round(time.time() - t0, 3)
+                    parts.append(delta)
+                    text_len += len(delta)
+            if stop and text_len - checked >= check_every:
+                checked = text_len
+                if stop("".join(parts)):
+                    out["stopped"] = True
+                    break
+            if out["truncated"]: break
+        if (buf or pending) and not out["stopped"] and not out["truncated"]:
+            for payload in _payloads([buf, b""], mode, pending):
+                delta = _delta(payload, delta_path)
+                if delta: parts.append(delta)
+        out["text"] = "".join(parts)
+        return out
+    finally:
+        r.close()
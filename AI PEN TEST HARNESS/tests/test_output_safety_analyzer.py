@@ -0,0 +1,24 @@
+import io, json
+import pytest
+from modules.output_safety_analyzer import iter_json_array
+
+DOC = ('  [ "a", 7.25, -0.5e-3, 1E+10, 12345678901234567890, true, false, null,\n'
+       '  "esc \\" \\\\ \\/ \\n \\u00e9 \\ud83d\\ude00", {"k": [1, 2.5, {"x": "<script>"}]}, [], {}, "" ]  ')
+
+def test_split_number():
+    assert list(iter_json_array(io.StringIO('["a", 7.25]'), read_size=8)) == ["a", 7.25]
+
+@pytest.mark.parametrize("read_size", list(range(1, len(DOC) + 1)) + [1 << 20])
+def test_matches_json_load(read_size):
+    # every read boundary: inside numbers, strings, escapes, literals and nested containers
+    assert list(iter_json_array(io.StringIO(DOC), read_size=read_size)) == json.load(io.StringIO(DOC))
+
+@pytest.mark.parametrize("doc", ["[]", " [ ] ", "[1]", '["x" ,\n "y"]'])
+def test_small_arrays(doc):
+    for read_size in range(1, len(doc) + 1):
+        assert list(iter_json_array(io.StringIO(doc), read_size=read_size)) == json.loads(doc)
+
+@pytest.mark.parametrize("doc", ['["a", 7.2', '["a", 7.]', "{}"])
+def test_invalid(doc):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(doc), read_size=3))
@@ -0,0 +1,128 @@
+import json, os, threading, time
+from contextlib import nullcontext
+
+# Spans in Chrome trace-event format (chrome://tracing, Perfetto). Disabled by default: span() hands back one shared
+# null context and hot paths test active() once, so an untraced run pays a global lookup per call site.
+MAX_EVENTS = 500_000
+SUMMARY_ORDER = ("phase", "http", "cpu")
+
+_tracer = None
+_NULL = nullcontext()
+_connect_orig = {}
+
+class Tracer:
+    def __init__(self, max_events=MAX_EVENTS):
+        self.t0 = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self.max_events = max_events
+        self.events = []
+        self.dropped = 0
+        self._threads = {}
+
+    def record(self, name, cat, start_ns, end_ns=None, **args):
+        end_ns = end_ns or time.perf_counter_ns()
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        # list.append is atomic under the GIL; no lock on the hot path
+        self.events.append((name, cat, start_ns, end_ns - start_ns, tid, args))
+
+    def span(self, name, cat="cpu", **args):
+        return _Span(self, name, cat, args)
+
+    def chrome_events(self):
+        meta = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": tname}}
+                for tid, tname in list(self._threads.items())]
+        return meta + [{"name": name, "cat": cat, "ph": "X", "ts": (start - self.t0) / 1000, "dur": dur / 1000,
+                        "pid": self.pid, "tid": tid, "args": args} for name, cat, start, dur, tid, args in self.events]
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.chrome_events(), "displayTimeUnit": "ms",
+                       "otherData": {"dropped_events": self.dropped}}, f, separators=(",", ":"), default=str)
+        return path
+
+    def summary(self):
+        # per (category, span name): count, summed / mean / max wall ms, bytes; spans on parallel threads add up
+        rows = {}
+        for name, cat, _, dur, _, args in self.events:
+            r = rows.setdefault((cat, name), {"cat": cat, "name": name, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "bytes": 0})
+            r["count"] += 1
+            r["total_ms"] += dur / 1e6
+            r["max_ms"] = max(r["max_ms"], dur / 1e6)
+            r["bytes"] += args.get("bytes") or 0
+        out = sorted(rows.values(), key=lambda r: (SUMMARY_ORDER.index(r["cat"]) if r["cat"] in SUMMARY_ORDER else len(SUMMARY_ORDER),
+                                                   -r["total_ms"]))
+        for r in out:
+            r["mean_ms"] = round(r["total_ms"] / r["count"], 3)
+            r["total_ms"], r["max_ms"] = round(r["total_ms"], 3), round(r["max_ms"], 3)
+        return out
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer, self.name, self.cat, self.args = tracer, name, cat, args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.cat, self.start, **self.args)
+
+def active():
+    return _tracer
+
+def span(name, cat="cpu", **args):
+    return _tracer.span(name, cat, **args) if _tracer else _NULL
+
+def now():
+    return time.perf_counter_ns()
+
+def _patch_connect():
+    # urllib3 opens sockets (DNS + TCP + TLS) in HTTP(S)Connection.connect; wrap it while tracing is on
+    try:
+        from urllib3.connection import HTTPConnection, HTTPSConnection
+    except ImportError:
+        return
+    for cls, tls in ((HTTPConnection, False), (HTTPSConnection, True)):
+        orig = cls.__dict__.get("connect")
+        if orig is None or cls in _connect_orig: continue
+        def connect(self, _orig=orig, _tls=tls):
+            t0 = time.perf_counter_ns()
+            try:
+                return _orig(self)
+            finally:
+                if _tracer: _tracer.record("connect", "http", t0, host=self.host, port=self.port, tls=_tls)
+        _connect_orig[cls] = orig
+        cls.connect = connect
+
+def _unpatch_connect():
+    for cls, orig in _connect_orig.items():
+        cls.connect = orig
+    _connect_orig.clear()
+
+def enable(max_events=MAX_EVENTS):
+    global _tracer
+    _tracer = Tracer(max_events)
+    _patch_connect()
+    return _tracer
+
+def disable():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    _unpatch_connect()
+    return tracer
+
+def summary_md(rows, dropped=0):
+    md = ["\n## Timing", "Spans summed across threads (parallel phases overlap). `ttfb` includes `connect` on new connections, `decode` includes `charset`.", "",
+          "| category | span | count | total ms | mean ms | max ms | bytes |", "|---|---|---:|---:|---:|---:|---:|"]
+    for r in rows:
+        md.append(f"| {r['cat']} | {r['name']} | {r['count']} | {r['total_ms']:.1f} | {r['mean_ms']:.2f} | {r['max_ms']:.1f} | {r['bytes'] or ''} |")
+    if dropped:
+        md.append(f"\n{dropped} events dropped after the first {MAX_EVENTS}.")
+    md.append("")
+    return md
@@ -0,0 +1,25 @@
+import copy, os, threading
+
+# plans and payload corpora parsed once per (path, mtime, size); a long-running process re-reads them only when they change
+_CACHE = {}
+_LOCK = threading.Lock()
+
+def load_yaml(path):
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    with _LOCK:
+        data = _CACHE.get(key, _CACHE)
+    if data is _CACHE:
+        import yaml
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+        with _LOCK:
+            for k in [k for k in _CACHE if k[0] == key[0]]:
+                del _CACHE[k]
+            _CACHE[key] = data
+    # callers own their copy and may mutate it
+    return copy.deepcopy(data)
+
+def cache_info():
+    with _LOCK:
+        return [{"path": k[0], "mtime_ns": k[1], "size": k[2]} for k in _CACHE]
@@ -0,0 +1,69 @@
+#!/usr/bin/env bash
+# scripts/aipentest.sh
+# /pentest entry point (telegram-bot.js -> repository_dispatch -> Mobile-Dispatch workflow -> here).
+# Hands the run to a warm harness service when one answers, otherwise runs harness.py in a fresh interpreter.
+set -euo pipefail
+
+usage() {
+  cat <<'USAGE'
+Usage:
+  aipentest.sh [harness.py args]        queue a run on the warm service (falls back to a cold harness.py run)
+  aipentest.sh default [harness args]   same, against $AIPT_TARGET
+  aipentest.sh serve [service args]     run the warm service in the foreground (systemd / self-hosted runner)
+  aipentest.sh status [job-id]          service health, or one job
+
+Examples:
+  aipentest.sh https://target.tld --max-pages 80
+  aipentest.sh https://target.tld --plan plans/active_plan.yaml --run-active
+  aipentest.sh serve --workers 2 --max-queue 16 --per-target 1
+  AIPT_SERVICE=http://127.0.0.1:8787 aipentest.sh serve --port 8787   # TCP instead of the socket
+
+Env:
+  AIPT_SERVICE     unix:/run/aipentest/harness.sock (default; "serve" listens there too) or http://host:port
+  AIPT_TARGET      target for "default"
+  AIPT_NO_SERVICE  1 = always run harness.py directly
+  PYTHON           interpreter (default python3)
+
+Relative paths are resolved in "AI PEN TEST HARNESS/". Service jobs are confined: --outdir / --state / --findings-db /
+--record / --cache-dir resolve under the service's out_service/, plans / samples / archives must be inside one of the two.
+The socket is mode 660, owned by the aipentest group: the user running this script must be a member.
+USAGE
+}
+
+ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+PY="${PYTHON:-python3}"
+cd "$ROOT/AI PEN TEST HARNESS"
+# one address for both ends: "serve" (systemd unit) listens where submit connects
+export AIPT_SERVICE="${AIPT_SERVICE:-unix:/run/aipentest/harness.sock}"
+
+case "${1:-}" in
+  -h|--help) usage; exit 0;;
+  serve)
+    shift
+    [[ "$AIPT_SERVICE" == unix:* ]] && set -- --socket "${AIPT_SERVICE#unix:}" "$@"
+    exec "$PY" service.py serve "$@";;
+  status) shift; exec "$PY" service.py status "$@";;
+esac
+
+if [[ $# -eq 0 || "$1" == "default" ]]; then
+  [[ $# -gt 0 ]] && shift
+  if [[ -z "${AIPT_TARGET:-}" ]]; then
+    echo "No target: pass harness.py arguments or set AIPT_TARGET"; usage; exit 1
+  fi
+  set -- "$AIPT_TARGET" "$@"
+fi
+
+if [[ "${AIPT_NO_SERVICE:-0}" != "1" ]]; then
+  # service.py submit: 0 done, 1 failed, 2 rejected, 3 no service listening
+  set +e
+  "$PY" service.py submit -- "$@"
+  RC=$?
+  set -e
+  [[ "$RC" -ne 3 ]] && exit "$RC"
+  echo "No warm service at $AIPT_SERVICE; running harness.py directly"
+fi
+
+if ! "$PY" -c "import requests, rich, bs4, yaml" 2>/dev/null; then
+  "$PY" -m pip install -r requirements.txt --disable-pip-version-check -q
+fi
+exec "$PY" harness.py "$@"
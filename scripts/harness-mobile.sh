@@ -14,6 +14,8 @@ OUT_BASE="out_mobile"
 DRY_RUN=0
 QUIET_PIP=1
 VENV_DIR=".venv-mobile"
+PROFILE="low-mem"              # low-mem | default
+MEM_CEILING=""                 # MB, low-mem only (harness default 150)
 
 usage() {
   cat <<'USAGE'
@@ -21,7 +23,8 @@ Usage:
   harness-mobile.sh --target https://target.tld [--mode passive|active|samples]
                     [--max-pages 80] [--timeout 12]
                     [--plan plans/active_plan.yaml] [--samples samples.json]
-                    [--out out_mobile] [--dry-run]
+                    [--out out_mobile] [--profile low-mem|default]
+                    [--mem-ceiling 150] [--dry-run]
 
 Examples:
   # Passive healthcheck (README default)
@@ -33,10 +36,14 @@ Examples:
   # Offline output safety analysis (samples)
   harness-mobile.sh --mode samples --target https://target.tld --samples samples.json
 
+  # Big crawl on a phone, checked against a 150 MB peak RSS
+  harness-mobile.sh --target https://target.tld --max-pages 500 --mem-ceiling 150
+
 Notes:
   - Creates/uses Python venv at .venv-mobile (separate vom Projektvenv).
   - Copies example plan if PLAN fehlt und plans/active_plan.example.yaml existiert.
   - Outputs landen in OUT_BASE/<timestamp> (z.B. out_mobile/2025-08-15_12-34-56).
+  - Profile low-mem (Default hier): Crawl-State, Pages/Scripts und Findings auf Disk, begrenzte Worker/Bodies; Peak RSS im Summary.
 USAGE
 }
 
@@ -50,6 +57,8 @@ while [[ $# -gt 0 ]]; do
     --plan) PLAN="${2:-}"; shift 2;;
     --samples) SAMPLES="${2:-}"; shift 2;;
     -o|--out) OUT_BASE="${2:-}"; shift 2;;
+    --profile) PROFILE="${2:-}"; shift 2;;
+    --mem-ceiling) MEM_CEILING="${2:-}"; shift 2;;
     --dry-run) DRY_RUN=1; shift;;
     -h|--help) usage; exit 0;;
     *) echo "Unknown arg: $1"; usage; exit 1;;
@@ -61,6 +70,10 @@ case "$MODE" in
   passive|active|samples) ;;
   *) echo "Invalid --mode: $MODE"; usage; exit 1;;
 esac
+case "$PROFILE" in
+  low-mem|default) ;;
+  *) echo "Invalid --profile: $PROFILE"; usage; exit 1;;
+esac
 if [[ -z "${TARGET}" ]]; then
   echo "Missing --target"; usage; exit 1
 fi
@@ -131,12 +144,15 @@ case "$MODE" in
     CMD+=( --samples "$SAMPLES" --outdir "$OUTDIR" )
     ;;
 esac
+CMD+=( --profile "$PROFILE" )
+[[ -n "$MEM_CEILING" ]] && CMD+=( --mem-ceiling-mb "$MEM_CEILING" )
 
 echo "Mode    : $MODE"
 echo "Target  : $TARGET"
 [[ "$MODE" == "passive" ]] && echo "Crawl   : max-pages=$MAX_PAGES timeout=$TIMEOUT"
 [[ "$MODE" == "active"  ]] && echo "Plan    : $PLAN (will run active probes)"
 [[ "$MODE" == "samples" ]] && echo "Samples : $SAMPLES"
+echo "Profile : $PROFILE${MEM_CEILING:+ (ceiling ${MEM_CEILING} MB)}"
 echo "Outdir  : $OUTDIR"
 echo "Command : ${CMD[*]}"
 
@@ -159,6 +175,12 @@ if [[ -f "${OUTDIR}/report.md" ]]; then
 fi
 if [[ -f "${OUTDIR}/report.json" ]]; then
   echo "Report JSON: ${OUTDIR}/report.json"
+  python - "${OUTDIR}/report.json" <<'PY' || true
+import json, sys
+m = json.load(open(sys.argv[1])).get("memory")
+if m:
+    print(f"Peak RSS  : {m['peak_rss_mb']} MB (ceiling {m['ceiling_mb']} MB, {'ok' if m['within_ceiling'] else 'OVER'})")
+PY
 fi
 [[ -f "${OUTDIR}/targets-checklist.md" ]] && echo "Checklist : ${OUTDIR}/targets-checklist.md"
 